@@ -0,0 +1,246 @@
+"""
+Local check of src.gdrive_download against an HTTP server standing in for Drive.
+
+1. Confirm form: the first request gets Drive's "can't scan this file for
+   viruses" page; the downloader must follow its download-form. The first
+   ranged responses are cut off mid-range, so the first attempt fails; the
+   second attempt must resume from the .part.json progress, fetch only the
+   missing bytes and produce a file with the right MD5.
+2. Cookie token: the older interstitial with only a download_warning cookie.
+3. Checksum mismatch: a wrong expected MD5 fails and leaves no .part files
+   behind to resume from.
+4. Missing .part: after an interrupted download the .part file is deleted
+   but its .part.json is left; the next attempt must start over instead of
+   trusting the ranges the sidecar marks done (checked without an expected
+   MD5, so only the file's own MD5 catches the zero-filled ranges).
+
+Ranges and chunks are shrunk so the test file is a few MB. Run:
+
+    python check_gdrive_download.py
+"""
+
+import hashlib
+import json
+import os
+import re
+import socket
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from src import gdrive_download
+from src.gdrive_download import download_url
+
+FILE_ID = "1AbCdEfGhIjKlMnOpQrStUvWxYz"
+ETAG = '"v1"'
+CONFIRM_PAGE = """<!DOCTYPE html><html><head><title>Google Drive - Virus scan warning</title></head>
+<body><p>Google Drive can't scan this file for viruses.</p>
+<form id="download-form" action="{action}" method="get">
+<input type="submit" value="Download anyway"/>
+<input type="hidden" name="id" value="{file_id}">
+<input type="hidden" name="export" value="download">
+<input type="hidden" name="confirm" value="t">
+<input type="hidden" name="uuid" value="0f1e2d3c">
+</form></body></html>"""
+
+
+class _Drive(BaseHTTPRequestHandler):
+    """Serves self.server.data behind a confirm page, with Range support."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        query = parse_qs(urlparse(self.path).query)
+        if query.get("id") != [FILE_ID]:
+            self._send(404, b"not found")
+            return
+        if query.get("confirm") != [server.token]:
+            if server.mode == "form":
+                action = f"http://127.0.0.1:{server.server_port}/download"
+                page = CONFIRM_PAGE.format(action=action, file_id=FILE_ID)
+                self._send(200, page.encode(), [("Content-Type", "text/html; charset=utf-8")])
+            else:
+                cookie = f"download_warning_{FILE_ID}={server.token}; Path=/"
+                self._send(200, b"<html>Virus scan warning</html>", [
+                    ("Content-Type", "text/html; charset=utf-8"),
+                    ("Set-Cookie", cookie),
+                ])
+            return
+
+        data = server.data
+        match = re.fullmatch(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+        if not match:
+            self._send(200, data, [("Content-Type", "application/octet-stream"), ("ETag", ETAG)])
+            return
+        start, end = int(match.group(1)), min(int(match.group(2)), len(data) - 1)
+        with server.lock:
+            server.requested.append((start, end))
+            drop = end > start and server.drops_left > 0
+            if drop:
+                server.drops_left -= 1
+        headers = [
+            ("Content-Type", "application/octet-stream"),
+            ("Content-Range", f"bytes {start}-{end}/{len(data)}"),
+            ("ETag", ETAG),
+        ]
+        if not drop:
+            self._send(206, data[start:end + 1], headers)
+            return
+
+        # Promise the whole range, send part of it and drop the connection
+        self.send_response(206)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        self.wfile.write(data[start:start + (end - start + 1) * 2 // 3])
+        self.wfile.flush()
+        self.connection.shutdown(socket.SHUT_RDWR)
+        self.close_connection = True
+
+
+def _serve(data, mode="form", drops=0):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Drive)
+    server.daemon_threads = True
+    server.data = data
+    server.mode = mode
+    server.token = "t" if mode == "form" else "Xy12"
+    server.drops_left = drops
+    server.requested = []
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _url(server):
+    return f"http://127.0.0.1:{server.server_port}/uc"
+
+
+def _params():
+    return {"id": FILE_ID, "export": "download"}
+
+
+def _served_bytes(requested):
+    # The 1-byte probe is not part of the download itself
+    return sum(end - start + 1 for start, end in requested if end > start)
+
+
+def _left_behind(output_path):
+    return [path for path in (f"{output_path}.part", f"{output_path}.part.json") if os.path.exists(path)]
+
+
+def _interrupted_download(server, output_path, data, **kwargs):
+    """Run a download the server cuts off; returns the bytes saved as done."""
+    try:
+        download_url(_url(server), output_path, params=_params(), connections=4, quiet=True, **kwargs)
+    except (requests.RequestException, IOError) as e:
+        print(f"[CHECK] First attempt cut off as intended: {type(e).__name__}")
+    else:
+        raise AssertionError("first attempt finished although connections were dropped")
+    assert not os.path.exists(output_path), "a partial download was moved into place"
+    with open(f"{output_path}.part.json") as f:
+        done = sum(done for _, _, done in json.load(f)["ranges"])
+    assert 0 < done < len(data), f"expected saved partial progress, got {done} of {len(data)} bytes"
+    return done
+
+
+def check_confirm_and_resume(directory, data, md5):
+    server = _serve(data, mode="form", drops=2)
+    output_path = os.path.join(directory, "form_data_full.csv")
+    try:
+        done = _interrupted_download(server, output_path, data, expected_md5=md5)
+
+        server.requested.clear()
+        download_url(_url(server), output_path, params=_params(), connections=4, expected_md5=md5, quiet=True)
+        refetched = _served_bytes(server.requested)
+        assert refetched == len(data) - done, (
+            f"resume fetched {refetched} bytes, expected the {len(data) - done} missing ones"
+        )
+        with open(output_path, "rb") as f:
+            assert hashlib.md5(f.read()).hexdigest() == md5, "MD5 of the resumed download differs"
+        assert not _left_behind(output_path), _left_behind(output_path)
+        print(f"[CHECK] Confirm form and resume OK: {done} bytes kept, {refetched} re-fetched, MD5 matches")
+    finally:
+        server.shutdown()
+
+
+def check_cookie_token(directory, data, md5):
+    server = _serve(data, mode="cookie")
+    output_path = os.path.join(directory, "cookie.bin")
+    try:
+        download_url(_url(server), output_path, params=_params(), connections=4, expected_md5=md5, quiet=True)
+        with open(output_path, "rb") as f:
+            assert hashlib.md5(f.read()).hexdigest() == md5, "MD5 of the cookie-token download differs"
+        print("[CHECK] download_warning cookie OK")
+    finally:
+        server.shutdown()
+
+
+def check_md5_mismatch(directory, data):
+    server = _serve(data, mode="form")
+    output_path = os.path.join(directory, "corrupt.bin")
+    try:
+        try:
+            download_url(_url(server), output_path, params=_params(), expected_md5="0" * 32, quiet=True)
+        except IOError as e:
+            assert "md5 mismatch" in str(e), e
+        else:
+            raise AssertionError("a wrong MD5 was accepted")
+        assert not os.path.exists(output_path), "a file with the wrong MD5 was moved into place"
+        assert not _left_behind(output_path), _left_behind(output_path)
+        print("[CHECK] MD5 mismatch OK: rejected, nothing left to resume from")
+    finally:
+        server.shutdown()
+
+
+def check_missing_part(directory, data, md5):
+    server = _serve(data, mode="form", drops=2)
+    output_path = os.path.join(directory, "f.bin")
+    try:
+        _interrupted_download(server, output_path, data)
+        os.remove(f"{output_path}.part")
+
+        server.requested.clear()
+        download_url(_url(server), output_path, params=_params(), connections=4, quiet=True)
+        refetched = _served_bytes(server.requested)
+        assert refetched == len(data), f"fetched {refetched} of {len(data)} bytes after the .part was deleted"
+        with open(output_path, "rb") as f:
+            assert hashlib.md5(f.read()).hexdigest() == md5, "stale .part.json left zero-filled ranges"
+        assert not _left_behind(output_path), _left_behind(output_path)
+        print("[CHECK] Missing .part OK: stale progress discarded, whole file re-fetched, MD5 matches")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    # 4 ranges of 1 MB, read in 64 KB chunks
+    gdrive_download.MIN_PART_SIZE = 1 << 20
+    gdrive_download.CHUNK_SIZE = 64 << 10
+    data = os.urandom(4 << 20)
+    md5 = hashlib.md5(data).hexdigest()
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            check_confirm_and_resume(directory, data, md5)
+            check_cookie_token(directory, data, md5)
+            check_md5_mismatch(directory, data)
+            check_missing_part(directory, data, md5)
+        except AssertionError as e:
+            print(f"[CHECK] FAILED: {e}")
+            sys.exit(1)
+    print("✅ Google Drive download checks passed")
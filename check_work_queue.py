@@ -0,0 +1,119 @@
+"""
+Local multi-process check of src.work_queue, with processes standing in for hosts.
+
+1. Crash reclaim: one worker is SIGKILLed while it holds a batch; two other
+   workers finish the queue, including that batch once its lease expires.
+2. Heartbeat: a batch that takes several lease lengths to process stays with
+   its worker (claimed once) while another worker keeps polling.
+
+The stand-in process functions only sleep and return a fake result path, so
+no browser or work table is needed. Run:
+
+    python check_work_queue.py
+"""
+
+import os
+import signal
+import sqlite3
+import sys
+import tempfile
+import time
+from multiprocessing import Process
+
+from src.work_queue import WorkQueue, run_worker
+
+
+def _hang(task):
+    time.sleep(3600)
+
+
+def _quick(task):
+    time.sleep(0.2)
+    return f"result_{task[0]}_{task[4]}.arrow"
+
+
+def _slow(task):
+    # Several lease lengths long for the AL batch only
+    time.sleep(5 if task[0] == "AL" else 0.2)
+    return f"result_{task[0]}_{task[4]}.arrow"
+
+
+def _make_queue(path, states, lease_seconds):
+    queue = WorkQueue(path, lease_seconds=lease_seconds)
+    queue.add_batches([(state, "work_input.arrow", i * 10, i * 10 + 10, 0, 1) for i, state in enumerate(states)])
+    queue.close()
+
+
+def _attempts(path):
+    with sqlite3.connect(path) as conn:
+        return dict(conn.execute("SELECT state, attempts FROM batches"))
+
+
+def _counts(path):
+    queue = WorkQueue(path)
+    try:
+        return queue.counts()
+    finally:
+        queue.close()
+
+
+def check_crash_reclaim(directory, lease_seconds=2):
+    path = os.path.join(directory, "crash.db")
+    _make_queue(path, ["AL", "CA", "TX", "NY"], lease_seconds)
+
+    doomed = Process(target=run_worker, args=(path, _hang, lease_seconds, "host-a:1"))
+    doomed.start()
+    deadline = time.time() + 10
+    while _counts(path).get("leased", 0) < 1:
+        if time.time() > deadline:
+            raise AssertionError("doomed worker never claimed a batch")
+        time.sleep(0.05)
+    os.kill(doomed.pid, signal.SIGKILL)
+    doomed.join()
+    print(f"[CHECK] Killed host-a mid-batch: {_counts(path)}")
+
+    workers = [
+        Process(target=run_worker, args=(path, _quick, lease_seconds, f"host-{name}:1"))
+        for name in ("b", "c")
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0, f"worker exited with {worker.exitcode}"
+
+    counts, attempts = _counts(path), _attempts(path)
+    assert counts == {"done": 4}, counts
+    assert sorted(attempts.values()) == [1, 1, 1, 2], attempts
+    print(f"[CHECK] Crash reclaim OK: {counts}, attempts {attempts}")
+
+
+def check_heartbeat(directory, lease_seconds=1.5):
+    path = os.path.join(directory, "heartbeat.db")
+    _make_queue(path, ["AL", "CA", "TX"], lease_seconds)
+
+    workers = [
+        Process(target=run_worker, args=(path, _slow, lease_seconds, f"host-{name}:1"))
+        for name in ("a", "b")
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0, f"worker exited with {worker.exitcode}"
+
+    counts, attempts = _counts(path), _attempts(path)
+    assert counts == {"done": 3}, counts
+    assert attempts["AL"] == 1, f"AL batch was reclaimed despite heartbeats: {attempts}"
+    print(f"[CHECK] Heartbeat OK: {counts}, attempts {attempts}")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            check_crash_reclaim(directory)
+            check_heartbeat(directory)
+        except AssertionError as e:
+            print(f"[CHECK] FAILED: {e}")
+            sys.exit(1)
+    print("✅ Work queue checks passed")
@@ -0,0 +1,148 @@
+"""
+Chrome profile lifecycle for Pool workers.
+
+Each worker process gets one profile directory, chrome_cache_<pid>, reused
+warm across every chunk that worker handles. Profiles live on tmpfs
+(/dev/shm) when it has room, else in the system temp directory, and Chrome's
+disk and media caches are capped with command-line flags instead of being
+swept afterwards.
+
+Every profile records its owning pid (and, on Linux, the process start time
+so a reused pid is not mistaken for the owner). Cleanup only removes
+profiles whose owner is gone, so it never deletes a live sibling worker's
+profile, and it does not walk the directory tree to size it first.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+PROFILE_PREFIX = "chrome_cache_"
+PROFILE_ROOT_ENV = "SCRAPE_PROFILE_ROOT"
+OWNER_FILE = "owner.pid"
+TMPFS_ROOT = "/dev/shm"
+TMPFS_MIN_FREE = 512 * 1024 * 1024  # only use tmpfs when this much is free
+CACHE_SIZE_BYTES = 64 * 1024 * 1024
+# Profiles without an owner file predate this manager (tempfile.mkdtemp);
+# they are only removed once nothing has touched them for this long
+LEGACY_MAX_AGE = 24 * 3600
+
+# Other places Chrome profiles have ended up (snap Chromium remaps /tmp)
+LEGACY_ROOTS = ("/tmp", "/tmp/snap-private-tmp/snap.chromium/tmp")
+
+
+def profile_root():
+    """Directory new profiles are created in: $SCRAPE_PROFILE_ROOT, tmpfs, or temp."""
+    root = os.environ.get(PROFILE_ROOT_ENV)
+    if root:
+        return root
+    try:
+        stats = os.statvfs(TMPFS_ROOT)
+        if stats.f_bavail * stats.f_frsize >= TMPFS_MIN_FREE and os.access(TMPFS_ROOT, os.W_OK):
+            return TMPFS_ROOT
+    except (OSError, AttributeError):
+        pass
+    return tempfile.gettempdir()
+
+
+def _start_time(pid):
+    # Field 22 of /proc/<pid>/stat; the command name (field 2) may contain spaces
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rpartition(")")[2].split()[19]
+    except (OSError, IndexError):
+        return None
+
+
+def worker_profile(root=None):
+    """
+    Return this process's profile directory, creating it on first use.
+
+    Later calls from the same worker return the same (warm) profile.
+    """
+    root = root or profile_root()
+    pid = os.getpid()
+    path = os.path.join(root, f"{PROFILE_PREFIX}{pid}")
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, OWNER_FILE), "w") as f:
+        f.write(f"{pid} {_start_time(pid) or ''}\n")
+    return path
+
+
+def remove_worker_profile(root=None):
+    """Remove this process's profile directory once its Chrome has quit."""
+    path = os.path.join(root or profile_root(), f"{PROFILE_PREFIX}{os.getpid()}")
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+        print(f"[CLEANUP] Removed Chrome profile: {path}")
+
+
+def chrome_profile_args(user_data_dir, cache_size=CACHE_SIZE_BYTES):
+    """Chrome flags that pin the profile and cap its caches."""
+    return [
+        f"--user-data-dir={user_data_dir}",
+        f"--disk-cache-dir={os.path.join(user_data_dir, 'cache')}",
+        f"--disk-cache-size={cache_size}",
+        f"--media-cache-size={cache_size}",
+    ]
+
+
+def owner_alive(profile_dir):
+    """
+    Whether the process that owns profile_dir is still running.
+
+    Returns None for profiles without an owner file.
+    """
+    try:
+        with open(os.path.join(profile_dir, OWNER_FILE)) as f:
+            fields = f.read().split()
+    except OSError:
+        return None
+    if not fields or not fields[0].isdigit():
+        return None
+    pid = int(fields[0])
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by another user
+    if len(fields) > 1 and _start_time(pid) not in (None, fields[1]):
+        return False  # pid was reused by an unrelated process
+    return True
+
+
+def cleanup_stale_profiles(roots=None):
+    """
+    Remove Chrome profiles whose owning process has exited.
+
+    Args:
+        roots: Directories to scan (defaults to the profile root and legacy roots)
+
+    Returns:
+        Number of profiles removed
+    """
+    roots = roots or (profile_root(),) + LEGACY_ROOTS
+    removed = 0
+    for root in dict.fromkeys(roots):
+        try:
+            names = os.listdir(root)
+        except OSError:
+            continue
+        for name in names:
+            path = os.path.join(root, name)
+            if not name.startswith(PROFILE_PREFIX) or not os.path.isdir(path):
+                continue
+            alive = owner_alive(path)
+            if alive is None:
+                try:
+                    alive = time.time() - os.path.getmtime(path) < LEGACY_MAX_AGE
+                except OSError:
+                    continue
+            if alive:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+            print(f"[CLEANUP] Removed stale Chrome profile: {path}")
+    return removed
@@ -0,0 +1,116 @@
+"""
+Per-chunk bookkeeping shared by the scraping engines.
+
+src.scraper.process_state (Selenium, one Chrome per worker) and
+src.shared_browser.process_chunk (Playwright, one context per chunk) differ
+in how they drive the browser and read a page, not in what they do with
+what they read. ChunkRun holds that common part for one task: the result
+name, the memory-mapped input slice, the ResultBuilder, the stats tracker
+and the failure log, and the rules for which failure each filing records.
+"""
+
+import os
+
+from src.failures import MISSING_SUBMISSION_DATE, NO_ATTACHMENTS, PAGE_ERROR, FailureRecorder
+from src.page_state import FAILURE_FOR_STATE, valid_submission_date
+from src.results import FilingResult, ResultBuilder
+from src.state_stats import StatsTracker
+from src.work_table import read_slice, retry_tag, run_id, write_result
+
+CHECKPOINT_ROWS = 200
+
+
+def chunk_result_name(state_data):
+    """File stem for a task's results, failures and stats snapshot."""
+    state_name, input_path, _, _, chunk_idx, _ = state_data
+    # Sanitize state name for filenames (remove special characters)
+    safe_state_name = "".join(
+        c if c.isalnum() or c in (" ", "-", "_") else "_" for c in state_name
+    )
+    # The shared engine runs every chunk in one process, but (state, chunk)
+    # is unique within a pass
+    name = f"temp_results_{safe_state_name}_chunk{chunk_idx+1}_{os.getpid()}"
+    # Retry passes read work_input_<pid>_retry<n>.arrow; tag their outputs so
+    # they never overwrite the main pass's files for the same chunk
+    tag = retry_tag(input_path)
+    return f"{name}_retry{tag}" if tag else name
+
+
+class ChunkRun:
+    """
+    Results, stats and failures of one process_state task.
+
+    Args:
+        state_data: (state_name, input_path, start, stop, chunk_idx, num_chunks)
+        score: Whether attachments are scored (adds the Flesch column)
+    """
+
+    def __init__(self, state_data, score=True):
+        self.state_name, input_path, start, stop, self.chunk_idx, self.num_chunks = state_data
+        self.score = score
+        self.name = chunk_result_name(state_data)
+        # The input file is memory-mapped; only the serf_num column is copied out.
+        # Extracted fields go to a columnar builder and are joined back at flush time
+        self.input_slice = read_slice(input_path, start, stop)
+        self.serf_nums = self.input_slice.column("serf_num").to_pylist()
+        self.results = ResultBuilder(with_scores=score)
+        # Running per-state aggregates, snapshotted after every filing
+        self.tracker = StatsTracker(self.name, run_id(input_path))
+        # Classified failures, used for the retry passes and the dead-letter table
+        self.failures = FailureRecorder(self.name, self.state_name, input_path, start)
+        self.done = 0  # rows finished, whether or not they succeeded
+
+    def page_failed(self, idx, serf_num, page_state):
+        """Record a filing whose page never reached the summary state."""
+        self.failures.record(idx, serf_num, FAILURE_FOR_STATE[page_state])
+        self.tracker.record(self.state_name, None, [])
+        self.done = idx + 1
+
+    def start_filing(self, idx, serf_num, raw_submission_date):
+        """Start a filing's result from the submission date text on its page."""
+        result = FilingResult()
+        result.submission_date = valid_submission_date(raw_submission_date)
+        if result.submission_date is None:
+            self.failures.record(idx, serf_num, MISSING_SUBMISSION_DATE, raw_submission_date)
+        return result
+
+    def add_form(self, idx, serf_num, result, form_name, flesch_score=None, failure=None, detail=None):
+        """Add one form to a filing's result, recording its attachment failure if any."""
+        if failure is not None:
+            self.failures.record(idx, serf_num, failure, detail or form_name)
+        result.form_names.append(form_name)
+        if self.score:
+            result.flesch_scores.append(flesch_score)
+
+    def finish_filing(self, idx, serf_num, result):
+        """Commit a filing's result, checkpointing the chunk every CHECKPOINT_ROWS rows."""
+        if not result.form_names:
+            self.failures.record(idx, serf_num, NO_ATTACHMENTS)
+        self.results.add(idx, result)
+        self.tracker.record(
+            self.state_name, result.submission_date, result.form_names, result.flesch_scores
+        )
+        self.done = idx + 1
+        if idx % CHECKPOINT_ROWS == 0 and idx > 0:
+            self.write()
+
+    def fail_remaining(self, error):
+        """
+        Record every row not finished yet as a page error and write the chunk.
+
+        Used when the chunk itself breaks (e.g. its browser context dies), so
+        its rows still reach the merge, the retry passes and the dead-letter
+        table instead of disappearing.
+
+        Returns:
+            Path of the chunk's result file
+        """
+        for idx in range(self.done, len(self.serf_nums)):
+            self.failures.record(idx, self.serf_nums[idx], PAGE_ERROR, str(error))
+            self.tracker.record(self.state_name, None, [])
+        self.done = len(self.serf_nums)
+        return self.write()
+
+    def write(self):
+        """Write the rows so far (the rest empty) to the sink; returns the path."""
+        return write_result(self.name, self.results.to_table(self.input_slice))
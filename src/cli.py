@@ -0,0 +1,212 @@
+"""
+One command line for the scraping pipelines.
+
+Usage:
+    python -m src list --strategy equal-split
+    python -m src scrape --strategy whole-state
+    python -m src score --strategy state-chunks --processes 7
+    python -m src score --engine shared --contexts 16
+    python -m src merge outputs/sink --output form_names_submission_date.csv
+    python -m src summarize data/states_data_temp
+
+`scrape` extracts form names and submission dates (the old
+state_wise_scraping.py, equal_split.py and untitled.py); `score` also
+downloads each form's attachment and scores its Flesch reading ease (the old
+flesch.py). Those scripts differed mainly in how they split the work, which
+is now the --strategy option (see src.partitioning). `list` prints the plan
+a strategy produces without starting a browser.
+
+Only the standard library is imported at startup; each subcommand imports
+what it needs. Pool workers import src.scraper, which loads selenium,
+PyMuPDF and textstat only when a browser is started or a PDF is scored, and
+pandas is only loaded by the steps that build DataFrames.
+"""
+
+import argparse
+import os
+
+DEFAULT_PROCESSES = 7
+SCORE_FORMS = "data/form_data_full.csv"
+SCORE_SELECT = "data/to_extract_v2.csv"
+SCRAPE_FORMS = "data/to_fetch_states.csv"
+OUTPUT_PATH = "form_names_submission_date.csv"
+
+
+def load_work_table(forms_path, select_path=None, input_path=None):
+    """
+    Load the filings to process, sorted by state.
+
+    Args:
+        forms_path: Form index CSV (read through its Parquet cache)
+        select_path: Optional CSV of serf_nums to keep
+        input_path: Where to write the memory-mapped work table (not written if None)
+    """
+    from src.form_loader import load_forms_table, load_serf_nums
+    from src.work_table import write_work_table
+
+    serf_nums = load_serf_nums(select_path) if select_path else None
+    forms = load_forms_table(forms_path, serf_nums=serf_nums)
+    if input_path is None:
+        return forms.sort_by("state")
+    return write_work_table(forms, input_path)
+
+
+def plan(args, input_path=None):
+    """Load the work table and partition it; returns (tasks, input_path)."""
+    from src.partitioning import partition
+
+    table = load_work_table(args.forms, args.select, input_path)
+    tasks = partition(
+        args.strategy, table, input_path or args.forms, chunk_size=args.chunk_size, parts=args.parts
+    )
+    # Largest chunks first, so the longest tasks do not start last
+    tasks.sort(key=lambda x: x[3] - x[2], reverse=True)
+    return tasks
+
+
+def list_tasks(args):
+    tasks = plan(args)
+    print(f"{len(tasks)} tasks with strategy '{args.strategy}'")
+    for state_name, _, start, stop, chunk_idx, num_chunks in sorted(tasks, key=lambda t: (t[0], t[4])):
+        print(f"  - {state_name} chunk {chunk_idx+1}/{num_chunks}: {stop - start} rows")
+    return tasks
+
+
+def _run_pool(tasks, input_path, score, processes, retry):
+    from functools import partial
+    from multiprocessing import Pool, cpu_count
+
+    from src.chrome_profiles import cleanup_stale_profiles
+    from src.failures import retry_failures
+    from src.profiling import run_profiled
+    from src.scraper import prefer_system_chromedriver, process_state
+
+    prefer_system_chromedriver()
+    # Each Chrome takes ~1-1.5 GB, so memory rather than cores is the limit
+    n_proc = min(processes or min(cpu_count(), DEFAULT_PROCESSES), len(tasks))
+    print(f"\nUsing {n_proc} processes (CPU cores available: {cpu_count()})")
+
+    retry_files, retry_inputs = [], []
+    with Pool(n_proc) as pool:
+        target = partial(run_profiled, partial(process_state, score=score))
+        partial_files = list(pool.map(target, tasks))
+        if retry:
+            # Retry transient failures in fresh sessions; the rest is dead-lettered
+            retry_files, retry_inputs = retry_failures(pool, target, input_path)
+
+    # Workers have exited, so their Chrome profiles (and any left by crashed
+    # runs) can go
+    cleanup_stale_profiles()
+    return partial_files + retry_files, retry_inputs
+
+
+def _run_shared(tasks, input_path, score, contexts, retry):
+    from src.failures import retry_failures
+    from src.shared_browser import EnginePool, run_engine
+
+    print(f"\nUsing {contexts} browser contexts in one browser for {len(tasks)} chunks")
+    partial_files = run_engine(tasks, contexts, score=score)
+    retry_files, retry_inputs = [], []
+    if retry:
+        # The engine always runs its own process_chunk, so no map target is passed
+        retry_files, retry_inputs = retry_failures(EnginePool(contexts, score=score), None, input_path)
+    return partial_files + retry_files, retry_inputs
+
+
+def run_pipeline(args, score):
+    """Plan, scrape (and optionally score), then merge the sink into args.output."""
+    from src.failures import clear_failures
+    from src.profiling import merge_profiles, profiling_enabled, run_profile_dir
+    from src.summarize import merge_files
+
+    # Tasks only carry row ranges into this memory-mapped Arrow file
+    input_path = os.path.abspath(f"outputs/work_input_{os.getpid()}.arrow")
+    # A reused pid must not pick up the failure logs of an earlier run
+    clear_failures(input_path)
+    tasks = plan(args, input_path)
+    if not tasks:
+        print("No filings to process")
+        os.remove(input_path)
+        return 0
+
+    if args.engine == "shared":
+        partial_files, retry_inputs = _run_shared(tasks, input_path, score, args.contexts, args.retry)
+    else:
+        partial_files, retry_inputs = _run_pool(tasks, input_path, score, args.processes, args.retry)
+
+    # Merge per-chunk profiles into one flamegraph input when profiling is on
+    if profiling_enabled():
+        merge_profiles(run_profile_dir(input_path))
+
+    # Stream results from the sink into the final CSV
+    total_rows = merge_files(partial_files, args.output)
+
+    # Clean up temporary files
+    for f in partial_files + [input_path] + retry_inputs:
+        try:
+            os.remove(f)
+        except Exception as e:
+            pass
+
+    print(f"\n✅ All states completed. Results saved to {args.output} ({total_rows} rows)")
+    return total_rows
+
+
+def _add_plan_arguments(parser, forms, select):
+    from src.partitioning import CHUNK_SIZE, PARTS, STRATEGIES
+
+    parser.add_argument("--forms", default=forms, help="Form index CSV")
+    parser.add_argument("--select", default=select, help="CSV of serf_nums to keep")
+    parser.add_argument("--strategy", choices=list(STRATEGIES), default="state-chunks")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows per chunk (state-chunks)")
+    parser.add_argument("--parts", type=int, default=PARTS, help="Number of slices (contiguous-split)")
+
+
+def _add_run_arguments(parser):
+    parser.add_argument("--engine", choices=["pool", "shared"], default="pool")
+    parser.add_argument("--processes", type=int, default=None, help="Pool workers (pool engine)")
+    parser.add_argument("--contexts", type=int, default=8, help="Browser contexts (shared engine)")
+    parser.add_argument("--no-retry", dest="retry", action="store_false", help="Skip the retry passes")
+    parser.add_argument("--output", default=OUTPUT_PATH)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src", description="SERFF filing scraping pipeline")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="Show the tasks a partitioning strategy produces")
+    _add_plan_arguments(list_parser, SCORE_FORMS, SCORE_SELECT)
+
+    scrape_parser = subparsers.add_parser("scrape", help="Extract form names and submission dates")
+    _add_plan_arguments(scrape_parser, SCRAPE_FORMS, None)
+    _add_run_arguments(scrape_parser)
+
+    score_parser = subparsers.add_parser("score", help="Extract forms and score their attachments")
+    _add_plan_arguments(score_parser, SCORE_FORMS, SCORE_SELECT)
+    _add_run_arguments(score_parser)
+
+    merge_parser = subparsers.add_parser("merge", help="Deduplicated union of result files")
+    merge_parser.add_argument("input_dir", nargs="?", default="data/states_data_temp")
+    merge_parser.add_argument("--output", default=OUTPUT_PATH)
+
+    summarize_parser = subparsers.add_parser("summarize", help="Per-state summary table")
+    summarize_parser.add_argument("input_dir", nargs="?", default="data/states_data_temp")
+    summarize_parser.add_argument("--output", default="outputs/summarized_result_across_states.csv")
+
+    args = parser.parse_args(argv)
+    if args.command == "list":
+        list_tasks(args)
+    elif args.command in ("scrape", "score"):
+        run_pipeline(args, score=args.command == "score")
+    elif args.command == "merge":
+        from src.summarize import merge_results
+
+        merge_results(args.input_dir, args.output)
+    else:
+        from src.summarize import summarize_results
+
+        print(summarize_results(args.input_dir, args.output).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Classified failure recording, retry passes and the dead-letter table.
+
+Workers record why a filing came back incomplete instead of silently
+continuing: one JSON line per failure in outputs/failures/<run>/<chunk>.jsonl,
+tagged with the work table and row the filing came from. <run> is the work
+table's run id (see src.work_table.run_id), and a run's logs are cleared
+when it starts and removed once its dead-letter table is written, so a
+reused pid never retries rows of an older, different work table. After the main
+pass the parent re-runs only the filings with transient failures (page
+timeouts, expired sessions, downloads that never appeared) in fresh
+sessions, with exponential backoff between passes. Whatever still fails,
+and every permanent failure, is written to outputs/dead_letter.csv.
+
+Retry results land in the result sink after the originals, so the
+newest-wins merge in src.summarize picks them up. Rows of filings that failed
+transiently again are removed from a retry pass's results first, so a retry
+that timed out never replaces the partial data the earlier pass did get.
+"""
+
+import json
+import os
+import shutil
+import time
+
+import pyarrow as pa
+
+FAILURES_DIR_ENV = "SCRAPE_FAILURES_DIR"
+DEFAULT_FAILURES_DIR = "outputs/failures"
+DEAD_LETTER_PATH = "outputs/dead_letter.csv"
+
+TIMEOUT = "timeout"
+SESSION_EXPIRED = "session_expired"
+NO_ATTACHMENTS = "no_attachments"
+DOWNLOAD_MISSING = "download_missing"
+PDF_PARSE_ERROR = "pdf_parse_error"
+MISSING_SUBMISSION_DATE = "missing_submission_date"
+NO_FILING = "no_filing"
+PAGE_ERROR = "page_error"
+
+# Failures worth another attempt in a fresh browser session
+TRANSIENT_FAILURES = {TIMEOUT, SESSION_EXPIRED, DOWNLOAD_MISSING, PAGE_ERROR}
+
+
+def failures_dir(input_path):
+    """Failure log directory of the run that input_path (or one of its retry tables) belongs to."""
+    from src.work_table import run_id
+
+    return os.path.join(os.environ.get(FAILURES_DIR_ENV, DEFAULT_FAILURES_DIR), run_id(input_path))
+
+
+def clear_failures(input_path):
+    """Remove the failure logs of input_path's run."""
+    shutil.rmtree(failures_dir(input_path), ignore_errors=True)
+
+
+class FailureRecorder:
+    """
+    Append-only failure log for one process_state chunk.
+
+    Args:
+        name: File stem, unique per chunk (the chunk's result name)
+        state_name: State of the chunk
+        input_path: Work table the chunk reads from
+        start: First row of the chunk in the work table
+    """
+
+    def __init__(self, name, state_name, input_path, start):
+        directory = failures_dir(input_path)
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{name}.jsonl")
+        self.state_name = state_name
+        self.input_path = input_path
+        self.start = start
+
+    def record(self, idx, serf_num, failure, detail=None):
+        """Log a failure for row idx (0-based within the chunk)."""
+        entry = {
+            "state": self.state_name,
+            "serf_num": serf_num,
+            "failure": failure,
+            "detail": detail,
+            "input_path": self.input_path,
+            "row": self.start + idx,
+            "time": time.time(),
+        }
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+def load_failures(input_path):
+    """Read the failures recorded against one work table."""
+    directory = failures_dir(input_path)
+    entries = []
+    if not os.path.isdir(directory):
+        return entries
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".jsonl"):
+            continue
+        with open(os.path.join(directory, name)) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # a worker died mid-write
+                if entry["input_path"] == input_path:
+                    entries.append(entry)
+    return entries
+
+
+def _filing_key(entry):
+    return (entry["state"], entry["serf_num"])
+
+
+def retry_failures(pool, process, input_path, chunk_size=200, max_retries=2, backoff=30.0):
+    """
+    Re-run filings with transient failures, then write the dead-letter table.
+
+    Each pass copies the failed rows out of the previous pass's work table
+    into a small retry table and maps process over its chunks. Filings that
+    succeed in a pass drop out; the rest are retried until max_retries.
+
+    Args:
+        pool: multiprocessing Pool to run retry chunks on
+        process: The pool.map target (process_state or a wrapper around it;
+            None for src.shared_browser.EnginePool, which ignores it)
+        input_path: Work table of the main pass
+        chunk_size: Rows per retry chunk
+        max_retries: Number of retry passes
+        backoff: Seconds to wait before the first retry pass, doubled each pass
+
+    Returns:
+        (result paths written by the retry passes, retry work table paths)
+    """
+    from src.work_table import plan_chunks, write_work_table
+
+    current = load_failures(input_path)
+    retry_results = []
+    retry_inputs = []
+    pass_input = input_path
+    for attempt in range(1, max_retries + 1):
+        transient = {_filing_key(e): e["row"] for e in current if e["failure"] in TRANSIENT_FAILURES}
+        if not transient:
+            break
+
+        delay = backoff * 2 ** (attempt - 1)
+        print(f"[RETRY] Pass {attempt}: {len(transient)} filings with transient failures, waiting {delay:.0f}s")
+        time.sleep(delay)
+
+        source = pa.ipc.open_file(pa.memory_map(pass_input, "r")).read_all()
+        retry_input = input_path.replace(".arrow", f"_retry{attempt}.arrow")
+        retry_table = write_work_table(source.take(sorted(transient.values())), retry_input)
+        retry_inputs.append(retry_input)
+        pass_results = pool.map(process, plan_chunks(retry_table, retry_input, chunk_size))
+        pass_failures = load_failures(retry_input)
+        refailed = {_filing_key(e) for e in pass_failures if e["failure"] in TRANSIENT_FAILURES}
+        retry_results += drop_filings(pass_results, refailed)
+
+        current = [e for e in current if _filing_key(e) not in transient] + pass_failures
+        pass_input = retry_input
+
+    write_dead_letters(current)
+    clear_failures(input_path)
+    return retry_results, retry_inputs
+
+
+def drop_filings(result_paths, filings):
+    """
+    Remove the rows of the given (state, serf_num) filings from result files.
+
+    Files left empty are deleted.
+
+    Returns:
+        The result paths that still exist
+    """
+    from src.work_table import write_result
+
+    if not filings:
+        return list(result_paths)
+    kept = []
+    for path in result_paths:
+        with pa.OSFile(path, "rb") as source:
+            table = pa.ipc.open_file(source).read_all()
+        keys = zip(table.column("state").to_pylist(), table.column("serf_num").to_pylist())
+        keep = [key not in filings for key in keys]
+        dropped = keep.count(False)
+        if not dropped:
+            kept.append(path)
+            continue
+        table = table.filter(pa.array(keep, pa.bool_()))
+        if table.num_rows == 0:
+            os.remove(path)
+        else:
+            name = os.path.splitext(os.path.basename(path))[0]
+            kept.append(write_result(name, table, os.path.dirname(path)))
+        print(f"[RETRY] Dropped {dropped} rows that failed again from {path}")
+    return kept
+
+
+def write_dead_letters(entries, path=DEAD_LETTER_PATH):
+    """Write the failures left after all retry passes to the dead-letter table."""
+    import pandas as pd
+
+    columns = ["state", "serf_num", "failure", "detail", "input_path", "row", "time"]
+    dead = pd.DataFrame(entries, columns=columns)
+    dead.to_csv(path, index=False)
+    if len(dead):
+        counts = dead["failure"].value_counts().to_dict()
+        print(f"[RETRY] {dead[['state', 'serf_num']].drop_duplicates().shape[0]} filings dead-lettered to {path}: {counts}")
+    return path
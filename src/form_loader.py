@@ -0,0 +1,130 @@
+"""
+Filter-pushdown loader for the national form index (data/form_data_full.csv).
+
+The first read streams the CSV once into a Parquet cache next to it (explicit
+dtypes, derived columns dropped); later reads only touch the requested
+columns and push the serf_num filter into the Parquet scan, so the parent no
+longer holds the whole national index in memory just to select a few
+thousand filings. The cache is rebuilt whenever the CSV is newer than it.
+
+The page_url, auth_url and form columns the notebooks build with string ops
+are not stored; the scrapers derive the URLs from serf_num and state on
+demand with page_url() and auth_url().
+
+pyarrow.dataset (which loads pandas) and pyarrow.parquet are imported by the
+functions that read or write the cache, so Pool workers that only need
+page_url() and auth_url() do not pay for them.
+"""
+
+import csv
+import os
+
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+PAGE_URL_PREFIX = "https://filingaccess.serff.com/sfa/search/filingSummary.xhtml?filingId="
+AUTH_URL_PREFIX = "https://filingaccess.serff.com/sfa/home/"
+
+FORM_DTYPES = {
+    "Company Name": pa.string(),
+    "NAIC Company Code": pa.float64(),
+    "Insurance Product Name": pa.string(),
+    "Sub Type Of Insurance": pa.string(),
+    "Filing Type": pa.string(),
+    "Filing Status": pa.string(),
+    "SERFF Tracking Number": pa.string(),
+    "Page Number": pa.int64(),
+    "serf_num": pa.string(),  # mostly numeric, but not always (e.g. 6K3QQN680/00)
+    "state": pa.string(),
+}
+DERIVED_COLUMNS = ("page_url", "auth_url", "form")
+BLOCK_SIZE = 1 << 24  # 16 MB CSV blocks while building the cache
+
+
+def page_url(serf_num):
+    """Filing summary URL for a SERFF number."""
+    return f"{PAGE_URL_PREFIX}{serf_num}"
+
+
+def auth_url(state_name):
+    """Landing page that starts a search session for a state."""
+    return f"{AUTH_URL_PREFIX}{state_name}"
+
+
+def cache_path_for(csv_path):
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def build_cache(csv_path, cache_path=None):
+    """
+    Stream csv_path into a Parquet cache one block at a time.
+
+    Known columns get explicit types, unknown ones are kept as strings and
+    derived URL columns are dropped.
+
+    Returns:
+        Path of the Parquet cache
+    """
+    import pyarrow.parquet as pq
+
+    cache_path = cache_path or cache_path_for(csv_path)
+    with open(csv_path, newline="") as f:
+        header = next(csv.reader(f), [])
+    columns = [name for name in header if name and name not in DERIVED_COLUMNS]
+    column_types = {name: FORM_DTYPES.get(name, pa.string()) for name in columns}
+
+    reader = pacsv.open_csv(
+        csv_path,
+        read_options=pacsv.ReadOptions(block_size=BLOCK_SIZE),
+        convert_options=pacsv.ConvertOptions(
+            column_types=column_types, include_columns=columns
+        ),
+    )
+    # Unique temp name: several hosts may build the cache on a shared mount at once
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    rows = 0
+    with pq.ParquetWriter(tmp_path, reader.schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    os.replace(tmp_path, cache_path)
+    print(f"[LOAD] Cached {rows} rows from {csv_path} to {cache_path}")
+    return cache_path
+
+
+def ensure_cache(csv_path):
+    """Return the Parquet cache for csv_path, (re)building it if stale."""
+    cache_path = cache_path_for(csv_path)
+    if not os.path.exists(cache_path) or os.path.getmtime(cache_path) < os.path.getmtime(csv_path):
+        build_cache(csv_path, cache_path)
+    return cache_path
+
+
+def load_serf_nums(path, column="serf_num"):
+    """Read only the serf_num column of a selection file (e.g. to_extract_v2.csv)."""
+    table = pacsv.read_csv(
+        path,
+        convert_options=pacsv.ConvertOptions(
+            column_types={column: pa.string()}, include_columns=[column]
+        ),
+    )
+    return table.column(column).drop_null().unique()
+
+
+def load_forms_table(csv_path, serf_nums=None, columns=None):
+    """
+    Load the form index as a pyarrow Table with column and serf_num pushdown.
+
+    Args:
+        csv_path: Path to form_data_full.csv (the Parquet cache is derived from it)
+        serf_nums: Optional iterable/array of SERFF numbers to keep
+        columns: Optional list of columns to read (defaults to all cached columns)
+    """
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(ensure_cache(csv_path), format="parquet")
+    row_filter = None
+    if serf_nums is not None:
+        value_set = pa.array(serf_nums).cast(pa.string())
+        row_filter = ds.field("serf_num").isin(value_set)
+    return dataset.to_table(columns=columns, filter=row_filter)
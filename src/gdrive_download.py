@@ -0,0 +1,314 @@
+"""
+Download files (e.g. form_data_full.csv) from Google Drive.
+
+Large files are fetched with HTTP range requests over several parallel
+connections, written straight into a preallocated .part file with bounded
+memory per connection. Progress is saved next to it in a .part.json file,
+so an interrupted download resumes where each range left off. Drive's "can't
+scan this file for viruses" interstitial is handled by following its
+confirm form (or the older download_warning cookie). The final size, and
+optionally an MD5/SHA-256 checksum, is verified before the file is moved
+into place.
+
+Any plain http(s) URL works too, which is how the downloader is exercised
+against a local HTTP server: `python check_gdrive_download.py` serves a
+confirm page and drops connections mid-range, then checks the resume and
+the MD5.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+
+import requests
+from tqdm import tqdm
+
+DRIVE_DOWNLOAD_URL = "https://drive.usercontent.google.com/download"
+DRIVE_HOSTS = ("drive.google.com", "docs.google.com", "drive.usercontent.google.com")
+CHUNK_SIZE = 1 << 20  # bytes read per network chunk
+MIN_PART_SIZE = 8 << 20  # don't split files into ranges smaller than this
+CONNECTIONS = 8
+TIMEOUT = (10, 60)  # connect, read
+METHODS = ("auto", "requests")
+
+_ID_PATTERNS = (
+    re.compile(r"/file/d/([\w-]+)"),
+    re.compile(r"[?&]id=([\w-]+)"),
+    re.compile(r"/d/([\w-]+)"),
+)
+
+
+def extract_file_id(url):
+    """
+    Extract the file ID from a Google Drive URL, or return a bare ID unchanged.
+
+    Handles .../file/d/<id>/view, open?id=<id>, uc?id=<id> and bare IDs.
+    """
+    for pattern in _ID_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return match.group(1)
+    if re.fullmatch(r"[\w-]+", url):
+        return url
+    raise ValueError(f"Could not find a Google Drive file ID in: {url}")
+
+
+class _ConfirmFormParser(HTMLParser):
+    """Collect the action and hidden inputs of Drive's download-confirm form."""
+
+    def __init__(self):
+        super().__init__()
+        self.action = None
+        self.fields = {}
+        self._in_form = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "form" and (attrs.get("id") == "download-form" or "download" in (attrs.get("action") or "")):
+            self.action = attrs.get("action")
+            self._in_form = True
+        elif tag == "input" and self._in_form and attrs.get("name"):
+            self.fields[attrs["name"]] = attrs.get("value", "")
+
+    def handle_endtag(self, tag):
+        if tag == "form":
+            self._in_form = False
+
+
+def _is_html(response):
+    return response.headers.get("Content-Type", "").startswith("text/html")
+
+
+def _probe(session, url, params=None):
+    """
+    Request the first byte of url, following Drive's confirm interstitial.
+
+    Returns:
+        (url, params, total size or None, supports ranges, etag)
+    """
+    for _ in range(3):
+        response = session.get(
+            url, params=params, headers={"Range": "bytes=0-0"}, stream=True, timeout=TIMEOUT
+        )
+        response.raise_for_status()
+        if not _is_html(response):
+            break
+        page = response.text
+        parser = _ConfirmFormParser()
+        parser.feed(page)
+        token = next(
+            (value for name, value in response.cookies.items() if name.startswith("download_warning")),
+            None,
+        )
+        if parser.action:
+            url, params = parser.action, parser.fields
+        elif token:
+            params = dict(params or {}, confirm=token)
+        else:
+            raise ValueError(
+                "Google Drive returned an HTML page instead of the file; "
+                "is the file shared with 'Anyone with the link'?"
+            )
+    else:
+        raise ValueError("Google Drive kept returning the confirmation page")
+
+    with response:
+        if response.status_code == 206:
+            content_range = response.headers.get("Content-Range", "")
+            total = int(content_range.rpartition("/")[2]) if "/" in content_range else None
+            return response.url, None, total, total is not None, response.headers.get("ETag")
+        length = response.headers.get("Content-Length")
+        return response.url, None, int(length) if length else None, False, response.headers.get("ETag")
+
+
+class _Progress:
+    """
+    Per-range progress, persisted to the .part.json sidecar.
+
+    Saved progress is only trusted while the .part file it describes still
+    exists at full size; otherwise the ranges it marks done would be left
+    zero-filled.
+    """
+
+    def __init__(self, path, part_path, url, total, etag, connections):
+        self.path = path
+        self.lock = threading.Lock()
+        state = None
+        if os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            if state.get("total") != total or state.get("etag") != etag:
+                state = None  # the remote file changed; start over
+            elif not os.path.exists(part_path) or os.path.getsize(part_path) != total:
+                state = None  # the .part file was deleted or replaced; start over
+        if state is None:
+            part_size = max(MIN_PART_SIZE, -(-total // connections))
+            ranges = [[start, min(start + part_size, total) - 1, 0] for start in range(0, total, part_size)]
+            state = {"url": url, "total": total, "etag": etag, "ranges": ranges}
+        self.state = state
+
+    @property
+    def ranges(self):
+        return self.state["ranges"]
+
+    def done_bytes(self):
+        return sum(done for _, _, done in self.ranges)
+
+    def advance(self, index, nbytes):
+        with self.lock:
+            self.ranges[index][2] += nbytes
+
+    def save(self):
+        with self.lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.state, f)
+            os.replace(tmp_path, self.path)
+
+
+def _fetch_range(session, url, fd, progress, index, bar):
+    start, end, done = progress.ranges[index]
+    if start + done > end:
+        return
+    headers = {"Range": f"bytes={start + done}-{end}"}
+    with session.get(url, headers=headers, stream=True, timeout=TIMEOUT) as response:
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise IOError(f"Server ignored range request for bytes {start + done}-{end}")
+        offset = start + done
+        for chunk in response.iter_content(CHUNK_SIZE):
+            os.pwrite(fd, chunk, offset)
+            offset += len(chunk)
+            progress.advance(index, len(chunk))
+            if bar is not None:
+                bar.update(len(chunk))
+        progress.save()
+
+
+def _verify(path, total, expected_md5=None, expected_sha256=None):
+    size = os.path.getsize(path)
+    if total is not None and size != total:
+        raise IOError(f"Downloaded {size} bytes, expected {total}")
+    checks = [(name, expected) for name, expected in (("md5", expected_md5), ("sha256", expected_sha256)) if expected]
+    if not checks:
+        return
+    hashers = {name: hashlib.new(name) for name, _ in checks}
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            for hasher in hashers.values():
+                hasher.update(block)
+    for name, expected in checks:
+        actual = hashers[name].hexdigest()
+        if actual.lower() != expected.lower():
+            raise IOError(f"{name} mismatch: got {actual}, expected {expected}")
+
+
+def download_url(
+    url,
+    output_path,
+    params=None,
+    connections=CONNECTIONS,
+    expected_md5=None,
+    expected_sha256=None,
+    quiet=False,
+    session=None,
+):
+    """
+    Download url to output_path with parallel, resumable range requests.
+
+    Falls back to a single stream when the server does not support ranges.
+
+    Returns:
+        output_path
+    """
+    session = session or requests.Session()
+    url, params, total, ranged, etag = _probe(session, url, params)
+    part_path = f"{output_path}.part"
+    state_path = f"{part_path}.json"
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    bar = None if quiet else tqdm(total=total, unit="B", unit_scale=True, desc=os.path.basename(output_path))
+    try:
+        if ranged and total:
+            progress = _Progress(state_path, part_path, url, total, etag, connections)
+            if bar is not None:
+                bar.update(progress.done_bytes())
+            mode = os.O_RDWR | os.O_CREAT
+            fd = os.open(part_path, mode, 0o644)
+            try:
+                if os.fstat(fd).st_size != total:
+                    os.ftruncate(fd, total)
+                with ThreadPoolExecutor(max_workers=connections) as pool:
+                    futures = [
+                        pool.submit(_fetch_range, session, url, fd, progress, index, bar)
+                        for index in range(len(progress.ranges))
+                    ]
+                    for future in futures:
+                        future.result()
+            finally:
+                os.close(fd)
+                if os.path.exists(part_path):
+                    progress.save()
+        else:
+            with session.get(url, params=params, stream=True, timeout=TIMEOUT) as response:
+                response.raise_for_status()
+                with open(part_path, "wb") as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+                        if bar is not None:
+                            bar.update(len(chunk))
+    finally:
+        if bar is not None:
+            bar.close()
+
+    try:
+        _verify(part_path, total, expected_md5, expected_sha256)
+    except IOError:
+        # Don't resume from a corrupt file next time
+        for path in (part_path, state_path):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    os.replace(part_path, output_path)
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    return output_path
+
+
+def download_public_file_requests(url, output_path, **kwargs):
+    """
+    Download a publicly shared Google Drive file (or a plain http(s) URL).
+
+    Keyword arguments are passed on to download_url (connections,
+    expected_md5, expected_sha256, quiet, session).
+    """
+    host = re.sub(r"^https?://([^/]+).*$", r"\1", url) if re.match(r"https?://", url) else None
+    if host is not None and host not in DRIVE_HOSTS:
+        return download_url(url, output_path, **kwargs)
+    file_id = extract_file_id(url)
+    params = {"id": file_id, "export": "download"}
+    return download_url(DRIVE_DOWNLOAD_URL, output_path, params=params, **kwargs)
+
+
+def download_file(url_or_id, output_path=None, method="auto", quiet=False, **kwargs):
+    """
+    Download a Google Drive file given its share URL or file ID.
+
+    Args:
+        url_or_id: Share URL, uc/open URL, bare file ID, or any http(s) URL
+        output_path: Destination path (defaults to the file ID in the CWD)
+        method: "auto" or "requests" (both use the ranged downloader)
+        quiet: Hide the progress bar
+
+    Returns:
+        Path of the downloaded file
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown download method '{method}' (use one of {', '.join(METHODS)})")
+    if output_path is None:
+        output_path = extract_file_id(url_or_id)
+    return download_public_file_requests(url_or_id, output_path, quiet=quiet, **kwargs)
@@ -0,0 +1,208 @@
+"""
+Raw HTML archive of filing summary pages.
+
+When SCRAPE_ARCHIVE_DIR is set, process_state stores the HTML of every
+filing summary page it reaches, so a change to what we extract (attachment
+IDs, schedule item types, ...) can be rerun locally instead of re-crawling.
+
+Each worker appends to its own segment file, segment_<host>_<pid>.gz, where
+every page is a separate gzip member (so `zcat` still reads a whole
+segment), and records (serf_num, state, fetch time, offset, length) in a
+matching .idx.csv. Segments are never rewritten; a re-fetched page is just
+appended again and the newest fetch wins on re-extraction.
+
+Usage:
+    python -m src.html_archive reextract outputs/html_archive \
+        --output outputs/reextracted.csv
+    python -m src.html_archive show outputs/html_archive 130411958
+"""
+
+import argparse
+import csv
+import gzip
+import os
+import socket
+import time
+from multiprocessing import Pool, cpu_count
+
+ARCHIVE_DIR_ENV = "SCRAPE_ARCHIVE_DIR"
+INDEX_COLUMNS = ["serf_num", "state", "fetched_at", "offset", "length"]
+
+
+def archive_enabled():
+    """Return the archive directory if archiving is enabled, else None."""
+    return os.environ.get(ARCHIVE_DIR_ENV) or None
+
+
+class HtmlArchive:
+    """Append-only writer for one worker's archive segment."""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        stem = f"segment_{socket.gethostname()}_{os.getpid()}"
+        self.segment_path = os.path.join(directory, f"{stem}.gz")
+        self.index_path = os.path.join(directory, f"{stem}.idx.csv")
+        new_index = not os.path.exists(self.index_path)
+        self._segment = open(self.segment_path, "ab")
+        self._index = open(self.index_path, "a", newline="")
+        self._writer = csv.writer(self._index)
+        if new_index:
+            self._writer.writerow(INDEX_COLUMNS)
+
+    def append(self, serf_num, state_name, html):
+        """Store one fetched page."""
+        blob = gzip.compress(html.encode("utf-8"))
+        offset = self._segment.seek(0, os.SEEK_END)
+        self._segment.write(blob)
+        self._segment.flush()
+        # Index after the data is written, so the index never points past it
+        self._writer.writerow([serf_num, state_name, f"{time.time():.6f}", offset, len(blob)])
+        self._index.flush()
+
+    def close(self):
+        self._segment.close()
+        self._index.close()
+
+
+def iter_index(directory):
+    """Yield (segment_path, index row dict) for every archived page."""
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".idx.csv"):
+            continue
+        segment_path = os.path.join(directory, name[: -len(".idx.csv")] + ".gz")
+        with open(os.path.join(directory, name), newline="") as f:
+            for row in csv.DictReader(f):
+                yield segment_path, row
+
+
+def read_page(segment_path, offset, length):
+    with open(segment_path, "rb") as f:
+        f.seek(int(offset))
+        return gzip.decompress(f.read(int(length))).decode("utf-8")
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def parse_summary(html):
+    """
+    Extract fields from a filing summary page, mirroring process_state's selectors.
+
+    Returns:
+        dict with submission_date, raw_submission_date (the label's text, before
+        validation), form_name (list) and attachment_ids (list)
+    """
+    from lxml import html as lxml_html
+
+    from src.page_state import valid_form_name, valid_submission_date
+
+    tree = lxml_html.fromstring(html)
+    labels = tree.xpath("//label[contains(text(), 'Submission Date')]/../div")
+    raw_submission_date = labels[0].text_content().strip() if labels else None
+    submission_date = valid_submission_date(raw_submission_date)
+
+    form_names = []
+    attachment_ids = []
+    for row_div in tree.xpath(f"//div[{_has_class('row')}]"):
+        items = row_div.xpath(f".//div[{_has_class('col-lg-4')} and {_has_class('summaryScheduleItemData')}]")
+        if not items:
+            continue
+        form_name = valid_form_name(items[0].text_content())
+        if form_name is None:
+            continue
+        form_names.append(form_name)
+        links = row_div.xpath(".//a[contains(@id, 'downloadAttachment_')]/@id")
+        attachment_ids.append(links[0] if links else None)
+    return {
+        "submission_date": submission_date,
+        "raw_submission_date": raw_submission_date,
+        "form_name": form_names,
+        "attachment_ids": attachment_ids,
+    }
+
+
+def _extract_segment(args):
+    segment_path, rows = args
+    records = []
+    for row in rows:
+        try:
+            fields = parse_summary(read_page(segment_path, row["offset"], row["length"]))
+        except Exception as e:
+            print(f"[ARCHIVE] Failed to parse {row['serf_num']} in {segment_path}: {str(e)}")
+            continue
+        records.append(
+            {"serf_num": row["serf_num"], "state": row["state"], "fetched_at": float(row["fetched_at"]), **fields}
+        )
+    return records
+
+
+def reextract(directory, output_path, processes=None):
+    """
+    Rerun the summary parser over the whole archive on all cores.
+
+    Only the newest fetch of each (state, serf_num) is parsed.
+
+    Returns:
+        Number of filings written to output_path
+    """
+    import pandas as pd
+
+    latest = {}
+    for segment_path, row in iter_index(directory):
+        key = (row["state"], row["serf_num"])
+        # >= so that, within a segment, the later record wins a timestamp tie
+        if key not in latest or float(row["fetched_at"]) >= float(latest[key][1]["fetched_at"]):
+            latest[key] = (segment_path, row)
+
+    by_segment = {}
+    for segment_path, row in latest.values():
+        by_segment.setdefault(segment_path, []).append(row)
+
+    # Split large segments so every core gets work
+    tasks = []
+    batch = 2000
+    for segment_path, rows in by_segment.items():
+        rows.sort(key=lambda r: int(r["offset"]))
+        tasks += [(segment_path, rows[i : i + batch]) for i in range(0, len(rows), batch)]
+
+    records = []
+    with Pool(processes or cpu_count()) as pool:
+        for part in pool.imap_unordered(_extract_segment, tasks):
+            records.extend(part)
+
+    df = pd.DataFrame(
+        records, columns=["serf_num", "state", "fetched_at", "submission_date", "form_name", "attachment_ids"]
+    )
+    df.sort_values(["state", "serf_num"]).to_csv(output_path, index=False)
+    print(f"[ARCHIVE] Re-extracted {len(df)} filings from {len(by_segment)} segments to {output_path}")
+    return len(df)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Raw HTML archive of filing summary pages")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    reextract_parser = subparsers.add_parser("reextract", help="Rerun the parser over the archive")
+    reextract_parser.add_argument("archive_dir")
+    reextract_parser.add_argument("--output", default="outputs/reextracted.csv")
+    reextract_parser.add_argument("--processes", type=int, default=None)
+
+    show_parser = subparsers.add_parser("show", help="Print the newest archived page for a filing")
+    show_parser.add_argument("archive_dir")
+    show_parser.add_argument("serf_num")
+
+    args = parser.parse_args(argv)
+    if args.command == "reextract":
+        reextract(args.archive_dir, args.output, args.processes)
+    else:
+        matches = [(path, row) for path, row in iter_index(args.archive_dir) if row["serf_num"] == args.serf_num]
+        if not matches:
+            print(f"No archived page for {args.serf_num}")
+            return
+        path, row = max(reversed(matches), key=lambda m: float(m[1]["fetched_at"]))
+        print(read_page(path, row["offset"], row["length"]))
+
+
+if __name__ == "__main__":
+    main()
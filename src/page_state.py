@@ -0,0 +1,113 @@
+"""
+Fast page-state classifier for SERFF filing summary pages.
+
+Waiting for div.row alone means every session-expired, agreement, error or
+"no filing" page costs the full 20 s timeout before the row is skipped.
+Instead, one JavaScript probe checks all known signals at once and is polled
+every 100 ms, so each page type is recognized as soon as it renders and the
+caller can route it (re-authenticate, retry, record empty) immediately.
+
+Extracted fields are validated before they are stored, so layout junk such
+as a submission date of "ui-button" is rejected instead of saved.
+"""
+
+import time
+
+from src.failures import NO_FILING, PAGE_ERROR, SESSION_EXPIRED, TIMEOUT
+from src.state_stats import parse_submission_date
+
+SUMMARY = "summary"
+AGREEMENT = "agreement"
+EXPIRED = "session_expired"
+NOT_FOUND = "not_found"
+ERROR = "error"
+UNKNOWN = "unknown"
+TIMED_OUT = "timeout"
+
+# Failure class to record when a page ends up in a state other than SUMMARY
+FAILURE_FOR_STATE = {
+    AGREEMENT: SESSION_EXPIRED,
+    EXPIRED: SESSION_EXPIRED,
+    NOT_FOUND: NO_FILING,
+    ERROR: PAGE_ERROR,
+    UNKNOWN: PAGE_ERROR,
+    TIMED_OUT: TIMEOUT,
+}
+
+# Seconds a fully loaded page may show no known signal before it is UNKNOWN
+UNKNOWN_GRACE = 2.0
+
+# Returns the page state, or null while the page is still rendering. Order
+# matters: expiry banners can sit on top of a partially rendered summary,
+# and summary pages can legitimately contain the word "error".
+PAGE_STATE_JS = r"""
+const text = (document.body && document.body.innerText || "").slice(0, 20000);
+if (/view\s*expired|session\s+(has\s+)?(expired|timed\s*out)/i.test(text)) return "session_expired";
+const hasRows = document.querySelector("div.row") !== null;
+const hasSummary = Array.from(document.querySelectorAll("label")).some(
+    l => l.textContent.includes("Submission Date")
+) || document.querySelector("div.summaryScheduleItemData") !== null;
+if (hasRows && hasSummary) return "summary";
+if (document.querySelector("a[href*='userAgreement.xhtml']") !== null) return "agreement";
+if (Array.from(document.querySelectorAll("span")).some(s => s.textContent.trim() === "Accept")) return "agreement";
+if (document.readyState !== "complete") return null;
+if (/no\s+filing|filing\s+(was\s+)?not\s+found|could\s+not\s+be\s+found/i.test(text)) return "not_found";
+if (/(an\s+)?error\s+(has\s+)?occurred|exception|service\s+unavailable|bad\s+gateway/i.test(text)) return "error";
+if (hasRows) return "summary";
+return "loaded";
+"""
+
+
+def wait_for_page_state(driver, timeout=20, poll_frequency=0.1):
+    """
+    Block until the current page can be classified, at most timeout seconds.
+
+    Returns:
+        One of SUMMARY, AGREEMENT, EXPIRED, NOT_FOUND, ERROR, UNKNOWN or TIMED_OUT
+    """
+    # Imported here so the validators work without selenium (archive re-extraction)
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    loaded_since = []
+
+    def probe(d):
+        state = d.execute_script(PAGE_STATE_JS)
+        if state != "loaded":
+            return state
+        # Loaded but unrecognized: give late scripts a moment before giving up
+        if not loaded_since:
+            loaded_since.append(time.monotonic())
+        elif time.monotonic() - loaded_since[0] > UNKNOWN_GRACE:
+            return UNKNOWN
+        return None
+
+    # Script errors while the page navigates (e.g. "Execution context was
+    # destroyed" during a redirect) are polled past; if they persist the page
+    # times out like any other page that never settles
+    wait = WebDriverWait(
+        driver, timeout, poll_frequency=poll_frequency, ignored_exceptions=(WebDriverException,)
+    )
+    try:
+        return wait.until(probe)
+    except TimeoutException:
+        return TIMED_OUT
+
+
+def valid_submission_date(value):
+    """Return the submission date string if it parses as a SERFF date, else None."""
+    return value.strip() if parse_submission_date(value) is not None else None
+
+
+def valid_form_name(value):
+    """
+    Return a cleaned form name, or None for empty or UI-widget text.
+
+    Length is not checked: real form names run to several hundred characters.
+    """
+    if not value:
+        return None
+    name = " ".join(value.split())
+    if not name or name.lower().startswith("ui-"):
+        return None
+    return name
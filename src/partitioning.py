@@ -0,0 +1,104 @@
+"""
+Partitioning strategies: how a state-sorted work table is cut into tasks.
+
+Every strategy returns the same process_state task tuples,
+(state_name, input_path, start, stop, chunk_idx, num_chunks), so any of them
+can feed the Pool, the shared-browser engine or the work queue. A task never
+spans two states, since each task runs in one authenticated state session.
+
+    state-chunks      per-state chunks of at most chunk_size rows (flesch.py)
+    whole-state       one task per state (state_wise_scraping.py)
+    equal-split       per-state chunks the size of the smallest state (equal_split.py)
+    contiguous-split  `parts` equal contiguous slices of the state-sorted
+                      table, as np.array_split did in untitled.py, cut at
+                      state boundaries; a slice spanning k states becomes k
+                      tasks, so there are at least as many tasks as states
+
+pyarrow is imported by the strategies themselves, so the CLI can list the
+strategy names without loading it.
+"""
+
+CHUNK_SIZE = 1000
+PARTS = 8
+
+
+def state_ranges(table):
+    """Return (state_name, start, stop) for each state of a state-sorted table."""
+    import pyarrow.compute as pc
+
+    counts = pc.value_counts(table.column("state")).to_pylist()
+    ranges = []
+    start = 0
+    for entry in sorted(counts, key=lambda e: e["values"]):
+        ranges.append((entry["values"], start, start + entry["counts"]))
+        start += entry["counts"]
+    return ranges
+
+
+def state_chunks(table, path, chunk_size=CHUNK_SIZE, parts=PARTS):
+    from src.work_table import plan_chunks
+
+    return plan_chunks(table, path, chunk_size)
+
+
+def whole_state(table, path, chunk_size=CHUNK_SIZE, parts=PARTS):
+    return [(state_name, path, start, stop, 0, 1) for state_name, start, stop in state_ranges(table)]
+
+
+def equal_split(table, path, chunk_size=CHUNK_SIZE, parts=PARTS):
+    ranges = state_ranges(table)
+    if not ranges:
+        return []
+    smallest = min(stop - start for _, start, stop in ranges)
+    print(f"[PLAN] Smallest state size: {smallest} rows (using as chunk size)")
+    return state_chunks(table, path, chunk_size=smallest)
+
+
+def contiguous_split(table, path, chunk_size=CHUNK_SIZE, parts=PARTS):
+    num_rows = table.num_rows
+    parts = max(1, min(parts, num_rows))
+    # Same slice sizes as np.array_split: the first num_rows % parts get one extra row
+    base, extra = divmod(num_rows, parts)
+    bounds = [0]
+    for part in range(parts):
+        bounds.append(bounds[-1] + base + (1 if part < extra else 0))
+
+    pieces = {}
+    for state_name, state_start, state_stop in state_ranges(table):
+        for part_start, part_stop in zip(bounds, bounds[1:]):
+            start, stop = max(state_start, part_start), min(state_stop, part_stop)
+            if start < stop:
+                pieces.setdefault(state_name, []).append((start, stop))
+
+    tasks = []
+    for state_name, ranges in pieces.items():
+        for chunk_idx, (start, stop) in enumerate(ranges):
+            tasks.append((state_name, path, start, stop, chunk_idx, len(ranges)))
+    return tasks
+
+
+STRATEGIES = {
+    "state-chunks": state_chunks,
+    "whole-state": whole_state,
+    "equal-split": equal_split,
+    "contiguous-split": contiguous_split,
+}
+
+
+def partition(strategy, table, path, chunk_size=CHUNK_SIZE, parts=PARTS):
+    """
+    Cut a state-sorted work table into tasks with the named strategy.
+
+    Args:
+        strategy: One of STRATEGIES
+        table: The table written by src.work_table.write_work_table
+        path: Path of that work table
+        chunk_size: Rows per chunk for state-chunks
+        parts: Number of slices for contiguous-split
+
+    Returns:
+        List of task tuples
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown partitioning strategy '{strategy}' (use one of {', '.join(STRATEGIES)})")
+    return STRATEGIES[strategy](table, path, chunk_size=chunk_size, parts=parts)
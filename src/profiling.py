@@ -0,0 +1,183 @@
+"""
+Opt-in sampling profiler for Pool workers.
+
+Profiling is enabled by pointing SCRAPE_PROFILE_DIR at a directory. Each
+call to process_state is then wrapped by a signal-based stack sampler that
+writes one collapsed-stack file per chunk (named by state/chunk/retry
+pass/pid) into a subdirectory for the run (the work table's id), and the
+parent merges that run's chunk files into a single flamegraph input at the
+end:
+
+    SCRAPE_PROFILE_DIR=outputs/profiles python -m src score
+    flamegraph.pl outputs/profiles/work_input_<pid>/merged.collapsed > flame.svg
+
+With --engine shared, chunks interleave on one event loop, so the engine
+process is sampled as a whole, one file per pass (shared_engine*.collapsed);
+the PDF scoring subprocesses are not sampled.
+
+Optional settings:
+    SCRAPE_PROFILE_CLOCK     "cpu" (default, only counts CPU time, so waits on
+                             Chrome do not drown out fitz/textstat) or "wall"
+    SCRAPE_PROFILE_INTERVAL  seconds between samples (default 0.005)
+"""
+
+import os
+import signal
+import sys
+import time
+from collections import Counter
+
+from src.work_table import retry_tag, run_id
+
+PROFILE_DIR_ENV = "SCRAPE_PROFILE_DIR"
+PROFILE_CLOCK_ENV = "SCRAPE_PROFILE_CLOCK"
+PROFILE_INTERVAL_ENV = "SCRAPE_PROFILE_INTERVAL"
+MERGED_NAME = "merged.collapsed"
+
+_TIMERS = {
+    "cpu": (signal.ITIMER_PROF, signal.SIGPROF),
+    "wall": (signal.ITIMER_REAL, signal.SIGALRM),
+}
+
+
+def profiling_enabled():
+    """Return the profile output directory if profiling is enabled, else None."""
+    return os.environ.get(PROFILE_DIR_ENV) or None
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Sample the current process's Python stack on a timer signal.
+
+    Samples are stored as collapsed stacks (root;...;leaf -> count), the
+    input format expected by flamegraph.pl, speedscope and inferno.
+    """
+
+    def __init__(self, interval=0.005, clock="cpu"):
+        if clock not in _TIMERS:
+            raise ValueError(f"Unknown profile clock '{clock}' (use 'cpu' or 'wall')")
+        self.interval = interval
+        self.timer, self.signum = _TIMERS[clock]
+        self.stacks = Counter()
+        self._previous_handler = None
+
+    def _handle(self, signum, frame):
+        labels = []
+        while frame is not None:
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+        self.stacks[";".join(reversed(labels))] += 1
+
+    def start(self):
+        self._previous_handler = signal.signal(self.signum, self._handle)
+        signal.setitimer(self.timer, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(self.timer, 0, 0)
+        if self._previous_handler is not None:
+            signal.signal(self.signum, self._previous_handler)
+            self._previous_handler = None
+
+    def write(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def run_profile_dir(input_path):
+    """Profile directory of the run that input_path belongs to (created on use)."""
+    directory = os.path.join(profiling_enabled(), run_id(input_path))
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def profile_name(state_data):
+    """
+    Build the per-chunk profile file name from a process_state task tuple
+    (state_name, input_path, start, stop, chunk_idx, num_chunks).
+
+    Retry passes restart chunk numbering, so their names carry the retry tag.
+    """
+    state_name, input_path = str(state_data[0]), state_data[1]
+    safe_state_name = "".join(
+        c if c.isalnum() or c in ("-", "_") else "_" for c in state_name
+    )
+    tag = retry_tag(input_path)
+    suffix = f"_retry{tag}" if tag else ""
+    return f"{safe_state_name}_chunk{state_data[4] + 1}{suffix}_{os.getpid()}.collapsed"
+
+
+def profile_call(path, func, *args):
+    """Run func(*args) under a StackSampler and write its stacks to path."""
+    sampler = StackSampler(
+        interval=float(os.environ.get(PROFILE_INTERVAL_ENV, "0.005")),
+        clock=os.environ.get(PROFILE_CLOCK_ENV, "cpu"),
+    )
+    start = time.perf_counter()
+    sampler.start()
+    try:
+        return func(*args)
+    finally:
+        sampler.stop()
+        sampler.write(path)
+        elapsed = time.perf_counter() - start
+        print(
+            f"[PROFILE] {sum(sampler.stacks.values())} samples over {elapsed:.1f}s written to {path}"
+        )
+
+
+def run_profiled(func, state_data):
+    """
+    Run func(state_data), sampling it when SCRAPE_PROFILE_DIR is set.
+
+    Use functools.partial(run_profiled, process_state) as the pool.map
+    target so the wrapper stays picklable.
+    """
+    if not profiling_enabled():
+        return func(state_data)
+    path = os.path.join(run_profile_dir(state_data[1]), profile_name(state_data))
+    return profile_call(path, func, state_data)
+
+
+def merge_profiles(profile_dir, output_path=None):
+    """
+    Merge every per-chunk .collapsed file in profile_dir into one file.
+
+    Args:
+        profile_dir: Directory holding one run's per-chunk collapsed stacks
+            (see run_profile_dir)
+        output_path: Merged output path (defaults to profile_dir/merged.collapsed)
+
+    Returns:
+        Path of the merged collapsed-stack file
+    """
+    output_path = output_path or os.path.join(profile_dir, MERGED_NAME)
+    merged = Counter()
+    for name in sorted(os.listdir(profile_dir)):
+        path = os.path.join(profile_dir, name)
+        if not name.endswith(".collapsed") or os.path.abspath(path) == os.path.abspath(output_path):
+            continue
+        with open(path) as f:
+            for line in f:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                if stack and count.isdigit():
+                    merged[stack] += int(count)
+
+    with open(output_path, "w") as f:
+        for stack, count in merged.most_common():
+            f.write(f"{stack} {count}\n")
+    print(f"[PROFILE] Merged {sum(merged.values())} samples into {output_path}")
+    return output_path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python -m src.profiling PROFILE_DIR [OUTPUT]")
+        sys.exit(1)
+    merge_profiles(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
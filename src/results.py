@@ -0,0 +1,99 @@
+"""
+Compact in-worker result accumulation.
+
+The extraction loop fills one slotted FilingResult per filing and hands it to
+a ResultBuilder, which appends it to flat columnar buffers (list offsets plus
+values). Nothing touches pandas in the hot loop; the buffers are only turned
+into Arrow columns when a checkpoint or the final chunk result is flushed to
+the sink, joined onto the memory-mapped input slice without copying it.
+"""
+
+from array import array
+
+import pyarrow as pa
+
+
+class FilingResult:
+    """Fields extracted from one filing summary page."""
+
+    __slots__ = ("submission_date", "form_names", "flesch_scores")
+
+    def __init__(self):
+        self.submission_date = None
+        self.form_names = []
+        self.flesch_scores = []
+
+
+class ResultBuilder:
+    """
+    Columnar accumulator for FilingResults of one chunk, in row order.
+
+    Args:
+        with_scores: Also build the flesch_reading_ease column
+    """
+
+    def __init__(self, with_scores=True):
+        self.with_scores = with_scores
+        self.submission_dates = []
+        self.form_offsets = array("i", [0])
+        self.form_values = []
+        self.score_offsets = array("i", [0])
+        self.score_values = []
+
+    def __len__(self):
+        return len(self.submission_dates)
+
+    def _append(self, submission_date, form_names, flesch_scores):
+        self.submission_dates.append(submission_date)
+        self.form_values.extend(form_names)
+        self.form_offsets.append(len(self.form_values))
+        if self.with_scores:
+            self.score_values.extend(flesch_scores)
+            self.score_offsets.append(len(self.score_values))
+
+    def add(self, row, result):
+        """
+        Store the result for input row `row` (0-based within the chunk).
+
+        Rows must be added in increasing order; rows that were skipped (for
+        example because the page never loaded) are filled with empty results.
+        """
+        if row < len(self):
+            raise ValueError(f"Row {row} added after row {len(self) - 1}")
+        while len(self) < row:
+            self._append(None, (), ())
+        self._append(result.submission_date, result.form_names, result.flesch_scores)
+
+    def columns(self, num_rows):
+        """
+        Build the result columns for a chunk of num_rows rows as Arrow arrays.
+
+        Rows not yet added (e.g. at a mid-chunk checkpoint) get empty results.
+        """
+        padding = num_rows - len(self)
+        form_offsets = self.form_offsets.tolist() + [self.form_offsets[-1]] * padding
+        columns = {
+            "form_name": pa.ListArray.from_arrays(
+                pa.array(form_offsets, pa.int32()), pa.array(self.form_values, pa.string())
+            ),
+            "submission_date": pa.array(self.submission_dates + [None] * padding, pa.string()),
+        }
+        if self.with_scores:
+            score_offsets = self.score_offsets.tolist() + [self.score_offsets[-1]] * padding
+            columns["flesch_reading_ease"] = pa.ListArray.from_arrays(
+                pa.array(score_offsets, pa.int32()), pa.array(self.score_values, pa.float64())
+            )
+        return columns
+
+    def to_table(self, input_slice):
+        """Append the result columns to the chunk's input rows as one Arrow table."""
+        table = input_slice
+        for name, column in self.columns(input_slice.num_rows).items():
+            if name in table.column_names:
+                table = table.drop_columns([name])
+            table = table.append_column(name, column)
+        return table
+
+    def to_frame(self, input_slice):
+        """Same as to_table, as a pandas DataFrame."""
+        return self.to_table(input_slice).to_pandas()
@@ -0,0 +1,289 @@
+"""
+Selenium Pool engine: scrape one work chunk per task in its own Chrome.
+
+process_state takes the task tuples produced by src.partitioning and writes
+the chunk's results to the sink. With score=True (the flesch pipeline) each
+form's attachment is downloaded and scored; with score=False only the form
+names and submission date are extracted (the state-wise pipelines).
+
+selenium, PyMuPDF and textstat are imported inside the functions that use
+them, so the parent process and the partitioning, merge and summary steps
+start without loading them.
+"""
+
+import os
+import shutil
+import time
+
+from tqdm import tqdm
+
+from src.chrome_profiles import chrome_profile_args, worker_profile
+from src.chunk_run import ChunkRun
+from src.failures import DOWNLOAD_MISSING, PDF_PARSE_ERROR
+from src.form_loader import auth_url, page_url
+from src.html_archive import HtmlArchive, archive_enabled
+from src.page_state import AGREEMENT, EXPIRED, SUMMARY, valid_form_name, wait_for_page_state
+
+BASE_DIR = "downloads"
+
+
+def pdf_flesch_score(path):
+    """Flesch reading ease of a PDF's text, extracted with PyMuPDF."""
+    import fitz  # PyMuPDF
+    from textstat import flesch_reading_ease
+
+    text = ""
+    with fitz.open(path) as pdf:
+        for page in pdf:
+            text += page.get_text() or ""
+    return flesch_reading_ease(text)
+
+
+def make_driver(user_data_dir, download_prefs=False):
+    """Start headless Chrome on the given profile."""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    for arg in chrome_profile_args(user_data_dir):  # isolate and cap cache
+        options.add_argument(arg)
+    if download_prefs:
+        options.add_experimental_option(
+            "prefs",
+            {
+                "download.prompt_for_download": False,
+                "download.directory_upgrade": True,
+                "plugins.always_open_pdf_externally": True,
+            },
+        )
+    chrome_binary = os.environ.get("CHROME_BINARY")
+    if chrome_binary:
+        options.binary_location = chrome_binary
+
+    # Use a pre-downloaded ChromeDriver path if provided to avoid race conditions
+    driver_path = os.environ.get("CHROMEDRIVER_PATH")
+    if driver_path and os.path.isfile(driver_path) and os.access(driver_path, os.X_OK):
+        service = Service(driver_path)
+        return webdriver.Chrome(service=service, options=options)
+    # Fallback to Selenium Manager (lets Selenium pick compatible driver/arch)
+    return webdriver.Chrome(options=options)
+
+
+def prefer_system_chromedriver():
+    """Point CHROMEDRIVER_PATH at a system chromedriver (avoids wrong-arch downloads on ARM64)."""
+    for system_path in ("/usr/bin/chromedriver", "/usr/lib/chromium-browser/chromedriver"):
+        if os.path.exists(system_path):
+            os.environ["CHROMEDRIVER_PATH"] = system_path
+            break
+
+
+def authenticate(driver, state_name):
+    """Start a search session for a state by accepting the user agreement."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    driver.get(auth_url(state_name))
+    try:
+        begin = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable(
+                (
+                    By.XPATH,
+                    "//a[contains(@href, 'userAgreement.xhtml') and normalize-space()='Begin Search']",
+                )
+            )
+        )
+        begin.click()
+        accept = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable(
+                (By.XPATH, "//span[normalize-space()='Accept']")
+            )
+        )
+        accept.click()
+    except Exception as e:
+        pass
+
+
+def _wait_for_pdf(download_path, before_pdfs, max_wait=15, wait_interval=0.5):
+    """Poll download_path for a finished PDF that was not in before_pdfs."""
+    waited = 0.0
+    while waited < max_wait:
+        try:
+            current_files = os.listdir(download_path)
+        except Exception:
+            current_files = []
+        # New PDFs, excluding ones still downloading (.crdownload counterpart)
+        candidate_paths = [
+            os.path.join(download_path, f)
+            for f in current_files
+            if f.lower().endswith(".pdf")
+            and f not in before_pdfs
+            and not os.path.exists(os.path.join(download_path, f + ".crdownload"))
+        ]
+        if candidate_paths:
+            # Pick the most recent by mtime
+            return max(candidate_paths, key=lambda p: os.path.getmtime(p))
+        time.sleep(wait_interval)
+        waited += wait_interval
+    return None
+
+
+def _remove_pdf(path):
+    try:
+        if os.path.exists(path):
+            os.remove(path)
+    except Exception as e:
+        # Try to delete again after a short delay (file might be locked)
+        try:
+            time.sleep(0.5)
+            if os.path.exists(path):
+                os.remove(path)
+                print(f"[DELETE] Successfully deleted on retry: {path}")
+        except Exception as e2:
+            print(f"[ERROR] Failed to delete PDF on retry {path}: {str(e2)}")
+
+
+def _download_and_score(driver, link, download_path):
+    """
+    Click an attachment link, wait for the PDF and score it.
+
+    Returns:
+        (score, failure, detail)
+    """
+    driver.execute_script("arguments[0].removeAttribute('target');", link)
+    # Snapshot existing PDFs before clicking
+    try:
+        before_pdfs = {f for f in os.listdir(download_path) if f.lower().endswith(".pdf")}
+    except Exception:
+        before_pdfs = set()
+
+    driver.execute_script("arguments[0].click();", link)
+    actual_file_path = _wait_for_pdf(download_path, before_pdfs)
+    if not actual_file_path:
+        print(f"[PATH] File not found in: {download_path}")
+        # Investigate: list files in download directory
+        if os.path.exists(download_path):
+            files_in_dir = os.listdir(download_path)
+            if files_in_dir:
+                print(f"[PATH] Files in directory: {files_in_dir}")
+            else:
+                print(f"[PATH] Directory is empty")
+        else:
+            print(f"[PATH] Download directory does not exist")
+        return None, DOWNLOAD_MISSING, None
+
+    try:
+        return pdf_flesch_score(actual_file_path), None, None
+    except Exception as e:
+        print(f"[ERROR] Failed to process PDF: {str(e)}")
+        return None, PDF_PARSE_ERROR, str(e)
+    finally:
+        _remove_pdf(actual_file_path)
+
+
+def process_state(state_data, score=True):
+    """
+    Process all rows for a single state chunk and save progress immediately.
+    state_data is a tuple: (state_name, input_path, start, stop, chunk_idx, num_chunks)
+    where rows [start, stop) of the memory-mapped Arrow file at input_path
+    belong to this chunk. With score=False attachments are not downloaded and
+    every named form row is kept.
+    """
+    from selenium.webdriver.common.by import By
+
+    state_name = state_data[0]
+    chunk = ChunkRun(state_data, score=score)
+
+    # Per-worker Chrome profile, kept warm across this worker's chunks
+    driver = make_driver(worker_profile(), download_prefs=score)
+
+    download_path = None
+    if score:
+        # Create a single download directory per process (reused for all URLs)
+        download_path = os.path.abspath(os.path.join(BASE_DIR, f"proc_{os.getpid()}", state_name))
+        os.makedirs(download_path, exist_ok=True)
+        print(f"[PATH] Download directory: {download_path}")
+        driver.execute_cdp_cmd(
+            "Page.setDownloadBehavior",
+            {"behavior": "allow", "downloadPath": download_path},
+        )
+    # Opt-in raw HTML archive of summary pages, for re-extraction without re-fetching
+    archive_dir = archive_enabled()
+    archive = HtmlArchive(archive_dir) if archive_dir else None
+
+    try:
+        # Authenticate once for this state
+        authenticate(driver, state_name)
+
+        # Process all URLs for this state chunk
+        for idx, serf_num in tqdm(
+            enumerate(chunk.serf_nums),
+            total=len(chunk.serf_nums),
+            desc=f"State: {state_name} Chunk {chunk.chunk_idx+1}/{chunk.num_chunks} (PID {os.getpid()})",
+        ):
+            url = page_url(serf_num)
+
+            # Navigate and extract
+            driver.get(url)
+            page_state = wait_for_page_state(driver)
+            if page_state in (EXPIRED, AGREEMENT):
+                # Session dropped: re-authenticate and give the page one more try
+                authenticate(driver, state_name)
+                driver.get(url)
+                page_state = wait_for_page_state(driver)
+            if page_state != SUMMARY:
+                chunk.page_failed(idx, serf_num, page_state)
+                continue
+            if archive is not None:
+                archive.append(serf_num, state_name, driver.page_source)
+
+            try:
+                submission_label = driver.find_element(
+                    By.XPATH, "//label[contains(text(), 'Submission Date')]"
+                )
+                raw_submission_date = submission_label.find_element(
+                    By.XPATH, "../div"
+                ).text.strip()
+            except Exception as e:
+                raw_submission_date = None
+            result = chunk.start_filing(idx, serf_num, raw_submission_date)
+
+            for row_div in driver.find_elements(By.CSS_SELECTOR, "div.row"):
+                try:
+                    form_name = valid_form_name(
+                        row_div.find_element(
+                            By.CSS_SELECTOR, "div.col-lg-4.summaryScheduleItemData"
+                        ).text
+                    )
+                    if form_name is None:
+                        continue
+                    if not score:
+                        chunk.add_form(idx, serf_num, result, form_name)
+                        continue
+
+                    link = row_div.find_element(By.CSS_SELECTOR, "a[id*='downloadAttachment_']")
+                    flesch_score, failure, detail = _download_and_score(driver, link, download_path)
+                    chunk.add_form(idx, serf_num, result, form_name, flesch_score, failure, detail)
+                except Exception as e:
+                    continue
+
+            chunk.finish_filing(idx, serf_num, result)
+    finally:
+        driver.quit()
+        if archive is not None:
+            archive.close()
+        # Clean up the single download directory for this process
+        if download_path is not None:
+            try:
+                if os.path.exists(download_path):
+                    shutil.rmtree(download_path, ignore_errors=True)
+                    print(f"[DELETE] Deleted download directory: {download_path}")
+            except Exception as e:
+                print(f"[ERROR] Failed to delete download directory {download_path}: {str(e)}")
+
+    # Save progress for this state chunk immediately to the result sink
+    return chunk.write()
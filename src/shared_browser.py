@@ -0,0 +1,376 @@
+"""
+Shared-browser scraping engine.
+
+The Pool scripts launch one Chrome per worker process, roughly 1-1.5 GB each,
+so concurrency is capped by RAM long before CPU. This engine runs a single
+Chromium and gives every work chunk (one state session) its own isolated
+browser context: separate cookies and session, but one shared browser,
+GPU and network process set. Concurrency is the number of open contexts,
+not OS processes, and PDF scoring runs on a small process pool so the
+event loop only waits on the network.
+
+Chunks are the same (state_name, input_path, start, stop, chunk_idx,
+num_chunks) tasks process_state takes, and results, failures, stats and the
+HTML archive go through the same modules, so the rest of the pipeline
+(retry passes, newest-wins merge) is unchanged.
+
+Usage:
+    python -m src score --engine shared --contexts 16
+    python -m src.shared_browser measure --pages 8 --layout contexts
+    python -m src.shared_browser measure --pages 8 --layout processes
+
+`measure` opens the same number of pages either as contexts in one browser
+or as one browser per page (the Pool layout) and reports the memory of the
+browser process trees, as pages per GB.
+
+Requires playwright (`pip install playwright`). Set CHROME_BINARY to use an
+installed Chrome/Chromium instead of running `playwright install chromium`.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from src.chunk_run import ChunkRun
+from src.failures import DOWNLOAD_MISSING, PDF_PARSE_ERROR
+from src.form_loader import auth_url, page_url
+from src.html_archive import HtmlArchive, archive_enabled, parse_summary
+from src.page_state import (
+    AGREEMENT,
+    EXPIRED,
+    PAGE_STATE_JS,
+    SUMMARY,
+    TIMED_OUT,
+    UNKNOWN,
+    UNKNOWN_GRACE,
+)
+from src.scraper import pdf_flesch_score
+from src.work_table import retry_tag
+
+CONTEXTS = 8
+DOWNLOAD_TIMEOUT_MS = 15000
+BROWSER_ARGS = ["--disable-gpu", "--no-sandbox", "--disable-dev-shm-usage"]
+
+
+async def launch_browser(playwright, headless=True):
+    kwargs = {"headless": headless, "args": BROWSER_ARGS}
+    chrome_binary = os.environ.get("CHROME_BINARY")
+    if chrome_binary:
+        kwargs["executable_path"] = chrome_binary
+    return await playwright.chromium.launch(**kwargs)
+
+
+async def wait_for_page_state(page, timeout=20, poll_frequency=0.1):
+    """Async counterpart of src.page_state.wait_for_page_state for a Playwright page."""
+    probe = "() => {" + PAGE_STATE_JS + "}"
+    deadline = time.monotonic() + timeout
+    loaded_since = None
+    while time.monotonic() < deadline:
+        try:
+            state = await page.evaluate(probe)
+        except Exception:
+            state = None  # navigation in progress
+        if state == "loaded":
+            # Loaded but unrecognized: give late scripts a moment before giving up
+            loaded_since = loaded_since or time.monotonic()
+            if time.monotonic() - loaded_since > UNKNOWN_GRACE:
+                return UNKNOWN
+        elif state is not None:
+            return state
+        await asyncio.sleep(poll_frequency)
+    return TIMED_OUT
+
+
+async def authenticate(page, state_name):
+    """Start a search session for a state by accepting the user agreement."""
+    try:
+        await page.goto(auth_url(state_name))
+        await page.locator(
+            "xpath=//a[contains(@href, 'userAgreement.xhtml') and normalize-space()='Begin Search']"
+        ).click(timeout=10000)
+        await page.locator("xpath=//span[normalize-space()='Accept']").click(timeout=10000)
+    except Exception as e:
+        pass
+
+
+async def _score_attachment(page, attachment_id, scorer):
+    """Download one attachment and score it; returns (score, failure, detail)."""
+    link = page.locator(f"[id='{attachment_id}']")
+    try:
+        await link.evaluate("a => a.removeAttribute('target')")
+        async with page.expect_download(timeout=DOWNLOAD_TIMEOUT_MS) as info:
+            await link.evaluate("a => a.click()")
+        download = await info.value
+        path = await download.path()
+    except Exception as e:
+        return None, DOWNLOAD_MISSING, str(e)
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(scorer, pdf_flesch_score, path), None, None
+    except Exception as e:
+        print(f"[ERROR] Failed to process PDF: {str(e)}")
+        return None, PDF_PARSE_ERROR, str(e)
+    finally:
+        await download.delete()
+
+
+async def _open(page, url):
+    # Navigation errors are classified by the page-state probe that follows
+    try:
+        await page.goto(url, wait_until="commit")
+    except Exception as e:
+        print(f"[ERROR] Failed to open {url}: {str(e)}")
+
+
+async def _scrape_chunk(browser, chunk, scorer, archive, score):
+    state_name = chunk.state_name
+    context = await browser.new_context(accept_downloads=True)
+    try:
+        page = await context.new_page()
+        await authenticate(page, state_name)
+        print(f"[ENGINE] {state_name} chunk {chunk.chunk_idx+1}/{chunk.num_chunks}: {len(chunk.serf_nums)} filings")
+
+        for idx, serf_num in enumerate(chunk.serf_nums):
+            url = page_url(serf_num)
+
+            await _open(page, url)
+            page_state = await wait_for_page_state(page)
+            if page_state in (EXPIRED, AGREEMENT):
+                # Session dropped: re-authenticate and give the page one more try
+                await authenticate(page, state_name)
+                await _open(page, url)
+                page_state = await wait_for_page_state(page)
+            if page_state != SUMMARY:
+                chunk.page_failed(idx, serf_num, page_state)
+                continue
+
+            html = await page.content()
+            if archive is not None:
+                archive.append(serf_num, state_name, html)
+            fields = parse_summary(html)
+            result = chunk.start_filing(idx, serf_num, fields["raw_submission_date"])
+
+            for form_name, attachment_id in zip(fields["form_name"], fields["attachment_ids"]):
+                if not score:
+                    chunk.add_form(idx, serf_num, result, form_name)
+                    continue
+                if attachment_id is None:
+                    continue
+                flesch_score, failure, detail = await _score_attachment(page, attachment_id, scorer)
+                chunk.add_form(idx, serf_num, result, form_name, flesch_score, failure, detail)
+
+            chunk.finish_filing(idx, serf_num, result)
+    finally:
+        await context.close()
+
+
+async def process_chunk(browser, state_data, scorer, archive=None, score=True):
+    """
+    Scrape one work chunk in its own browser context.
+
+    Same task tuple and outputs as src.scraper.process_state; with
+    score=False attachments are not downloaded. If the chunk breaks (its
+    context dies, say), the rows it did not finish are recorded as page
+    errors, so the retry passes and the dead-letter table still see them.
+
+    Returns:
+        Path of the chunk's result file in the sink
+    """
+    chunk = ChunkRun(state_data, score=score)
+    try:
+        await _scrape_chunk(browser, chunk, scorer, archive, score)
+    except Exception as e:
+        print(f"[ERROR] Chunk {chunk.state_name} {chunk.chunk_idx+1}/{chunk.num_chunks} failed: {str(e)}")
+        return chunk.fail_remaining(e)
+    return chunk.write()
+
+
+async def run_engine_async(tasks, contexts=CONTEXTS, score_processes=None, headless=True, score=True):
+    """Run tasks with at most `contexts` browser contexts open at once."""
+    from playwright.async_api import async_playwright
+
+    semaphore = asyncio.Semaphore(contexts)
+    archive_dir = archive_enabled()
+    archive = HtmlArchive(archive_dir) if archive_dir else None
+
+    with ProcessPoolExecutor(score_processes or min(os.cpu_count() or 1, 4)) as scorer:
+        async with async_playwright() as playwright:
+            browser = await launch_browser(playwright, headless)
+
+            async def bounded(task):
+                async with semaphore:
+                    return await process_chunk(browser, task, scorer, archive, score)
+
+            try:
+                paths = await asyncio.gather(*(bounded(task) for task in tasks))
+            finally:
+                await browser.close()
+                if archive is not None:
+                    archive.close()
+    return paths
+
+
+def run_engine(tasks, contexts=CONTEXTS, score_processes=None, headless=True, score=True):
+    """
+    Scrape work chunks in one shared browser.
+
+    With SCRAPE_PROFILE_DIR set, the whole pass is sampled into one profile
+    in the run's profile directory (chunks interleave on the event loop).
+
+    Returns:
+        Result paths in the sink, in task order
+    """
+    from src.profiling import profile_call, profiling_enabled, run_profile_dir
+
+    run = partial(asyncio.run, run_engine_async(tasks, contexts, score_processes, headless, score))
+    if not profiling_enabled() or not tasks:
+        return run()
+    input_path = tasks[0][1]
+    tag = retry_tag(input_path)
+    name = f"shared_engine{f'_retry{tag}' if tag else ''}_{os.getpid()}.collapsed"
+    return profile_call(os.path.join(run_profile_dir(input_path), name), run)
+
+
+class EnginePool:
+    """Pool-like adapter so src.failures.retry_failures can drive the engine."""
+
+    def __init__(self, contexts=CONTEXTS, score_processes=None, score=True):
+        self.contexts = contexts
+        self.score_processes = score_processes
+        self.score = score
+
+    def map(self, process, tasks):
+        """Run tasks on the engine; process is ignored (every chunk runs process_chunk)."""
+        return run_engine(tasks, self.contexts, self.score_processes, score=self.score)
+
+
+# Memory measurement
+
+
+def _children(pid):
+    children = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                children += [int(c) for c in f.read().split()]
+    except OSError:
+        pass
+    return children
+
+
+def process_tree(pid):
+    """pid and all of its descendants."""
+    pids = []
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        pids.append(current)
+        stack += _children(current)
+    return pids
+
+
+def process_memory(pid):
+    """
+    Proportional set size of one process in bytes (RSS where PSS is unavailable).
+
+    PSS splits shared pages between the processes that map them, so summing it
+    over a tree does not count Chrome's shared libraries once per process.
+    """
+    for path, field in ((f"/proc/{pid}/smaps_rollup", "Pss:"), (f"/proc/{pid}/status", "VmRSS:")):
+        try:
+            with open(path) as f:
+                for line in f:
+                    if line.startswith(field):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            continue
+    return 0
+
+
+def tree_memory(root_pids):
+    """Total memory of the process trees rooted at root_pids, in bytes."""
+    pids = set()
+    for pid in root_pids:
+        pids.update(process_tree(pid))
+    return sum(process_memory(pid) for pid in pids)
+
+
+def _browser_pids(before):
+    # Browsers are children of the Playwright driver, itself a child of this process
+    return [pid for pid in process_tree(os.getpid()) if pid not in before]
+
+
+async def measure_async(url, pages, layout, settle=5.0, headless=True):
+    """
+    Open `pages` copies of url in the given layout and measure browser memory.
+
+    Args:
+        layout: "contexts" (one browser, one context per page) or
+            "processes" (one browser per page, like the Pool scripts)
+
+    Returns:
+        dict with layout, pages, memory_bytes and pages_per_gb
+    """
+    from playwright.async_api import async_playwright
+
+    before = set(process_tree(os.getpid()))
+    async with async_playwright() as playwright:
+        browsers = []
+        if layout == "contexts":
+            browsers.append(await launch_browser(playwright, headless))
+            targets = [browsers[0]] * pages
+        elif layout == "processes":
+            for _ in range(pages):
+                browsers.append(await launch_browser(playwright, headless))
+            targets = browsers
+        else:
+            raise ValueError(f"Unknown layout '{layout}' (use 'contexts' or 'processes')")
+
+        try:
+            opened = []
+            for browser in targets:
+                context = await browser.new_context()
+                page = await context.new_page()
+                opened.append(page)
+            await asyncio.gather(*(page.goto(url) for page in opened))
+            await asyncio.sleep(settle)
+            memory = tree_memory(_browser_pids(before))
+        finally:
+            for browser in browsers:
+                await browser.close()
+
+    return {
+        "layout": layout,
+        "pages": pages,
+        "memory_bytes": memory,
+        "pages_per_gb": pages / (memory / 1024**3) if memory else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shared-browser scraping engine")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    measure_parser = subparsers.add_parser("measure", help="Compare browser memory per page")
+    measure_parser.add_argument("--url", default=auth_url("CA"))
+    measure_parser.add_argument("--pages", type=int, default=8)
+    measure_parser.add_argument("--layout", choices=["contexts", "processes", "both"], default="both")
+    measure_parser.add_argument("--settle", type=float, default=5.0)
+
+    args = parser.parse_args(argv)
+    layouts = ["contexts", "processes"] if args.layout == "both" else [args.layout]
+    for layout in layouts:
+        stats = asyncio.run(measure_async(args.url, args.pages, layout, args.settle))
+        per_gb = stats["pages_per_gb"]
+        print(
+            f"[MEMORY] {layout:>9}: {stats['pages']} pages, "
+            f"{stats['memory_bytes'] / 1024**2:.0f} MB, "
+            f"{f'{per_gb:.1f}' if per_gb else 'n/a'} pages/GB"
+        )
+
+
+if __name__ == "__main__":
+    main()
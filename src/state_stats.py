@@ -0,0 +1,262 @@
+"""
+Incrementally maintained per-state summary statistics.
+
+Each worker keeps running aggregates per state (filings seen, min/max
+submission date, dated filings, filings with forms, Flesch mean and a
+quantile sketch) and rewrites a small JSON snapshot every time a filing
+result is committed. Snapshots go to a subdirectory per run, named after the
+run's work table (outputs/stats/work_input_<pid>/), so earlier runs never
+leak into the numbers. Querying the current numbers mid-run only reads and
+merges that run's snapshots, one per worker chunk, instead of rescanning
+every result file:
+
+    python -m src.state_stats                      # most recently active run
+    python -m src.state_stats --run work_input_1234
+
+The aggregates are not deduplicated, so a filing processed twice (a retried
+chunk, for example) is counted twice; src.summarize rebuilds the exact
+summary from the result files.
+"""
+
+import json
+import math
+import os
+import argparse
+from datetime import datetime
+
+STATS_DIR_ENV = "SCRAPE_STATS_DIR"
+DEFAULT_STATS_DIR = "outputs/stats"
+DATE_FORMAT = "%m/%d/%y"  # SERFF renders submission dates as 9/20/12
+
+# Flesch scores are bucketed at this width; quantiles are accurate to +/- half a bucket
+SKETCH_BIN_WIDTH = 0.5
+
+
+def parse_submission_date(value):
+    """Parse a SERFF submission date string, returning None for junk values."""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return datetime.strptime(value.strip(), DATE_FORMAT).date()
+    except ValueError:
+        return None
+
+
+class QuantileSketch:
+    """Fixed-width histogram over Flesch scores; O(1) updates and mergeable."""
+
+    def __init__(self, bins=None):
+        self.bins = dict(bins or {})
+
+    def add(self, value):
+        key = math.floor(value / SKETCH_BIN_WIDTH)
+        self.bins[key] = self.bins.get(key, 0) + 1
+
+    def merge(self, other):
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+
+    def quantile(self, q):
+        total = sum(self.bins.values())
+        if total == 0:
+            return None
+        # Nearest-rank quantile, reported at the bucket midpoint
+        rank = max(1, math.ceil(q * total))
+        seen = 0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen >= rank:
+                break
+        return (key + 0.5) * SKETCH_BIN_WIDTH
+
+    def to_dict(self):
+        return {str(key): count for key, count in self.bins.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls({int(key): count for key, count in data.items()})
+
+
+class StateStats:
+    """Running aggregates for one state."""
+
+    def __init__(self):
+        self.filings = 0
+        self.count = 0  # filings with a valid submission date
+        self.non_empty_form_name = 0
+        self.min_date = None
+        self.max_date = None
+        self.flesch_count = 0
+        self.flesch_sum = 0.0
+        self.flesch_sketch = QuantileSketch()
+
+    def add_filing(self, submission_date, form_names, flesch_scores=()):
+        """
+        Fold one committed filing result into the aggregates.
+
+        Args:
+            submission_date: Raw submission date string from the summary page
+            form_names: Form names extracted for the filing
+            flesch_scores: Flesch reading ease per form (None entries are skipped)
+        """
+        self.filings += 1
+        date = parse_submission_date(submission_date)
+        if date is not None:
+            self.count += 1
+            self.min_date = date if self.min_date is None else min(self.min_date, date)
+            self.max_date = date if self.max_date is None else max(self.max_date, date)
+        if form_names:
+            self.non_empty_form_name += 1
+        for score in flesch_scores:
+            if score is None or isinstance(score, float) and math.isnan(score):
+                continue
+            self.flesch_count += 1
+            self.flesch_sum += score
+            self.flesch_sketch.add(score)
+
+    def merge(self, other):
+        self.filings += other.filings
+        self.count += other.count
+        self.non_empty_form_name += other.non_empty_form_name
+        for attr, pick in (("min_date", min), ("max_date", max)):
+            mine, theirs = getattr(self, attr), getattr(other, attr)
+            if theirs is not None:
+                setattr(self, attr, theirs if mine is None else pick(mine, theirs))
+        self.flesch_count += other.flesch_count
+        self.flesch_sum += other.flesch_sum
+        self.flesch_sketch.merge(other.flesch_sketch)
+
+    @property
+    def flesch_mean(self):
+        return self.flesch_sum / self.flesch_count if self.flesch_count else None
+
+    def to_dict(self):
+        return {
+            "filings": self.filings,
+            "count": self.count,
+            "non_empty_form_name": self.non_empty_form_name,
+            "min_date": self.min_date.isoformat() if self.min_date else None,
+            "max_date": self.max_date.isoformat() if self.max_date else None,
+            "flesch_count": self.flesch_count,
+            "flesch_sum": self.flesch_sum,
+            "flesch_sketch": self.flesch_sketch.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.filings = data["filings"]
+        stats.count = data["count"]
+        stats.non_empty_form_name = data["non_empty_form_name"]
+        for attr in ("min_date", "max_date"):
+            if data[attr]:
+                setattr(stats, attr, datetime.strptime(data[attr], "%Y-%m-%d").date())
+        stats.flesch_count = data["flesch_count"]
+        stats.flesch_sum = data["flesch_sum"]
+        stats.flesch_sketch = QuantileSketch.from_dict(data["flesch_sketch"])
+        return stats
+
+
+class StatsTracker:
+    """
+    Per-worker tracker that snapshots its StateStats after every commit.
+
+    Args:
+        name: Snapshot name, unique per worker chunk (e.g. AL_chunk1_1234)
+        run: Run id (see src.work_table.run_id); snapshots go to stats_dir/run
+        stats_dir: Snapshot directory (defaults to $SCRAPE_STATS_DIR or outputs/stats)
+    """
+
+    def __init__(self, name, run, stats_dir=None):
+        self.stats_dir = os.path.join(_stats_root(stats_dir), run)
+        os.makedirs(self.stats_dir, exist_ok=True)
+        self.path = os.path.join(self.stats_dir, f"{name}.json")
+        self.states = {}
+
+    def record(self, state_name, submission_date, form_names, flesch_scores=()):
+        stats = self.states.setdefault(state_name, StateStats())
+        stats.add_filing(submission_date, form_names, flesch_scores)
+        self.flush()
+
+    def flush(self):
+        # Write to a temp file and rename so readers never see a partial snapshot
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({state: stats.to_dict() for state, stats in self.states.items()}, f)
+        os.replace(tmp_path, self.path)
+
+
+def _stats_root(stats_dir=None):
+    return stats_dir or os.environ.get(STATS_DIR_ENV, DEFAULT_STATS_DIR)
+
+
+def latest_run(stats_dir=None):
+    """Run id whose snapshots were written most recently, or None."""
+    root = _stats_root(stats_dir)
+    if not os.path.isdir(root):
+        return None
+    runs = [name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name))]
+    # Every snapshot write renames into the run directory, bumping its mtime
+    return max(runs, key=lambda name: os.path.getmtime(os.path.join(root, name)), default=None)
+
+
+def load_state_stats(run=None, stats_dir=None):
+    """
+    Merge one run's worker snapshots into one StateStats per state.
+
+    Args:
+        run: Run id (defaults to the most recently active run)
+        stats_dir: Snapshot root (defaults to $SCRAPE_STATS_DIR or outputs/stats)
+    """
+    merged = {}
+    run = run or latest_run(stats_dir)
+    if run is None:
+        return merged
+    stats_dir = os.path.join(_stats_root(stats_dir), run)
+    if not os.path.isdir(stats_dir):
+        return merged
+    for name in sorted(os.listdir(stats_dir)):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(stats_dir, name)) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[STATS] Skipping unreadable snapshot {name}: {str(e)}")
+            continue
+        for state_name, data in snapshot.items():
+            merged.setdefault(state_name, StateStats()).merge(StateStats.from_dict(data))
+    return merged
+
+
+def stats_frame(states):
+    """Render merged StateStats as a summary table (one row per state)."""
+    import pandas as pd
+
+    rows = []
+    for state_name in sorted(states):
+        stats = states[state_name]
+        rows.append(
+            {
+                "state": state_name,
+                "min_date": stats.min_date,
+                "max_date": stats.max_date,
+                "count": stats.count,
+                "non_empty_form_name": stats.non_empty_form_name,
+                "filings": stats.filings,
+                "flesch_mean": stats.flesch_mean,
+                "flesch_p50": stats.flesch_sketch.quantile(0.5),
+                "flesch_p90": stats.flesch_sketch.quantile(0.9),
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-state running statistics of a scrape")
+    parser.add_argument("stats_dir", nargs="?", default=None)
+    parser.add_argument("--run", default=None, help="Run id (defaults to the most recently active run)")
+    args = parser.parse_args()
+    run = args.run or latest_run(args.stats_dir)
+    print(f"[STATS] Run: {run}")
+    print(stats_frame(load_state_stats(run, args.stats_dir)).to_string(index=False))
@@ -0,0 +1,295 @@
+"""
+Streaming merge and per-state summary of temp_results_* files.
+
+Result files are scanned one record batch at a time with pyarrow, reading
+only the columns each step needs, so hundreds of partial files never have to
+be loaded (or concatenated) at once. Filings that appear in more than one
+file are deduplicated by (state, serf_num), keeping the newest result (files
+ordered by modification time, later rows winning within a file). The state is
+part of the key because multi-state filings share one SERFF number.
+
+Both CSV results and the Arrow IPC files written to the result sink by
+src.work_table are accepted; Arrow list columns are rendered the same way
+pandas wrote them to CSV (e.g. "['Group Policy', 'Certificate']").
+
+Usage:
+    python -m src.summarize summarize data/states_data_temp \
+        --output outputs/summarized_result_across_states.csv
+    python -m src.summarize merge data/states_data_temp \
+        --output form_names_submission_date.csv
+"""
+
+import argparse
+import csv
+import os
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+RESULT_EXTENSIONS = (".csv", ".arrow")
+DATE_FORMAT = "%m/%d/%y"  # SERFF renders submission dates as 9/20/12
+SUMMARY_COLUMNS = ["serf_num", "state", "submission_date", "form_name"]
+BLOCK_SIZE = 1 << 22  # 4 MB read blocks keep per-batch memory small
+
+# Row order key: file index in the high bits, row within the file in the low bits
+_ROW_BITS = 32
+
+
+def list_result_files(input_dir):
+    """Return result files in input_dir, oldest first (by modification time)."""
+    files = [
+        os.path.join(input_dir, name)
+        for name in os.listdir(input_dir)
+        if name.endswith(RESULT_EXTENSIONS)
+    ]
+    return sorted(files, key=lambda p: (os.path.getmtime(p), p))
+
+
+def _is_arrow(path):
+    return path.endswith(".arrow")
+
+
+def read_header(path):
+    """Return the column names of a CSV or Arrow result file."""
+    if _is_arrow(path):
+        return pa.ipc.open_file(pa.memory_map(path, "r")).schema.names
+    with open(path, newline="") as f:
+        return next(csv.reader(f), [])
+
+
+def _as_strings(array):
+    """Cast an Arrow column to strings, rendering lists as Python list reprs."""
+    if pa.types.is_list(array.type) or pa.types.is_large_list(array.type):
+        return pa.array(
+            [None if value is None else repr(value) for value in array.to_pylist()],
+            pa.string(),
+        )
+    if pa.types.is_string(array.type):
+        return array
+    return array.cast(pa.string())
+
+
+def _iter_arrow_batches(path, columns=None):
+    reader = pa.ipc.open_file(pa.memory_map(path, "r"))
+    names = reader.schema.names
+    if columns is not None:
+        names = [c for c in columns if c in names]
+    for i in range(reader.num_record_batches):
+        batch = reader.get_batch(i)
+        yield pa.record_batch(
+            [_as_strings(batch.column(name)) for name in names], names=names
+        )
+
+
+def iter_batches(path, columns=None):
+    """
+    Stream a result file as pyarrow record batches with every column as string.
+
+    Args:
+        path: Result file path (.csv or .arrow)
+        columns: Columns to read (missing ones are skipped); None reads all
+    """
+    if _is_arrow(path):
+        yield from _iter_arrow_batches(path, columns)
+        return
+
+    header = read_header(path)
+    if columns is not None:
+        columns = [c for c in columns if c in header]
+    convert_options = pacsv.ConvertOptions(
+        column_types={name: pa.string() for name in header},
+        include_columns=columns,
+        strings_can_be_null=True,
+    )
+    reader = pacsv.open_csv(
+        path,
+        read_options=pacsv.ReadOptions(block_size=BLOCK_SIZE),
+        convert_options=convert_options,
+    )
+    for batch in reader:
+        yield batch
+
+
+def _column(batch, name):
+    idx = batch.schema.get_field_index(name)
+    if idx < 0:
+        return pa.nulls(batch.num_rows, pa.string())
+    return batch.column(idx)
+
+
+def _order_keys(file_idx, row_offset, num_rows):
+    start = (file_idx << _ROW_BITS) + row_offset
+    return pa.array(range(start, start + num_rows), pa.int64())
+
+
+def scan_latest(files):
+    """
+    Scan result files and keep the newest row per (state, serf_num).
+
+    Only a compact projection is kept per row (order key, state, parsed
+    submission date, non-empty form flag), so memory grows with the number of
+    filings rather than the size of the files.
+
+    Returns:
+        DataFrame with one row per (state, serf_num) and columns
+        serf_num, order, state, submission_date, has_forms
+    """
+    import pandas as pd
+
+    parts = []
+    for file_idx, path in enumerate(files):
+        row_offset = 0
+        for batch in iter_batches(path, SUMMARY_COLUMNS):
+            n = batch.num_rows
+            order = _order_keys(file_idx, row_offset, n)
+            form_name = _column(batch, "form_name")
+            has_forms = pc.fill_null(pc.not_equal(form_name, "[]"), False)
+            submission_date = pc.strptime(
+                _column(batch, "submission_date"), format=DATE_FORMAT, unit="s", error_is_null=True
+            )
+            parts.append(
+                pa.table(
+                    {
+                        "serf_num": _column(batch, "serf_num"),
+                        "order": order,
+                        "state": _column(batch, "state"),
+                        "submission_date": submission_date,
+                        "has_forms": has_forms,
+                    }
+                )
+            )
+            row_offset += n
+
+    if not parts:
+        return pd.DataFrame(columns=["serf_num", "order", "state", "submission_date", "has_forms"])
+
+    latest = pa.concat_tables(parts).to_pandas()
+    latest = latest.dropna(subset=["serf_num"]).sort_values("order", kind="stable")
+    return latest.drop_duplicates(["state", "serf_num"], keep="last").reset_index(drop=True)
+
+
+def summarize_latest(latest):
+    """Aggregate deduplicated rows into the per-state summary table."""
+    result = latest.groupby("state").agg(
+        min_date=("submission_date", "min"),
+        max_date=("submission_date", "max"),
+        count=("submission_date", "count"),
+        non_empty_form_name=("has_forms", "sum"),
+    )
+    result["min_date"] = result["min_date"].dt.date
+    result["max_date"] = result["max_date"].dt.date
+    return result.reset_index()
+
+
+def summarize_results(input_dir, output_path=None):
+    """
+    Compute the per-state summary (min/max submission date, count, non-empty
+    form names) over all result files in input_dir.
+
+    Args:
+        input_dir: Directory of temp_results_* files
+        output_path: Optional CSV path to write the summary to
+
+    Returns:
+        Summary DataFrame
+    """
+    files = list_result_files(input_dir)
+    print(f"[SUMMARY] Scanning {len(files)} result files in {input_dir}")
+    summary = summarize_latest(scan_latest(files))
+    if output_path:
+        summary.to_csv(output_path, index=False)
+        print(f"[SUMMARY] Saved summary for {len(summary)} states to {output_path}")
+    return summary
+
+
+def merge_results(input_dir, output_path):
+    """
+    Stream all result files in input_dir into one deduplicated CSV.
+
+    Returns:
+        Number of rows written
+    """
+    return merge_files(list_result_files(input_dir), output_path)
+
+
+def merge_files(files, output_path):
+    """
+    Stream the given result files into one deduplicated CSV.
+
+    A first pass picks the newest row for every filing (later files win); a
+    second pass streams each file again and writes only the winning rows, so
+    at most one record batch is held in memory at a time.
+
+    Returns:
+        Number of rows written
+    """
+    import numpy as np
+
+    # Split the winners by file once; each batch is then masked with a
+    # slice of its own file's row mask instead of a lookup in every winner
+    winners = np.sort(scan_latest(files)["order"].to_numpy(dtype=np.int64))
+    winner_files = winners >> _ROW_BITS
+    file_bounds = np.searchsorted(winner_files, np.arange(len(files) + 1))
+
+    columns = []
+    for path in files:
+        for name in read_header(path):
+            if name not in columns:
+                columns.append(name)
+    schema = pa.schema([(name, pa.string()) for name in columns])
+
+    written = 0
+    with pacsv.CSVWriter(
+        output_path, schema, write_options=pacsv.WriteOptions(quoting_style="needed")
+    ) as writer:
+        for file_idx, path in enumerate(files):
+            file_rows = winners[file_bounds[file_idx] : file_bounds[file_idx + 1]] - (file_idx << _ROW_BITS)
+            if len(file_rows) == 0:
+                continue
+            keep = np.zeros(int(file_rows[-1]) + 1, dtype=bool)
+            keep[file_rows] = True
+            row_offset = 0
+            for batch in iter_batches(path):
+                if row_offset >= len(keep):
+                    break  # no winners left in this file
+                n = batch.num_rows
+                mask = keep[row_offset : row_offset + n]
+                row_offset += n
+                if len(mask) < n:
+                    mask = np.concatenate([mask, np.zeros(n - len(mask), dtype=bool)])
+                batch = batch.filter(pa.array(mask))
+                if batch.num_rows == 0:
+                    continue
+                arrays = [_column(batch, name) for name in columns]
+                writer.write_batch(pa.record_batch(arrays, schema=schema))
+                written += batch.num_rows
+
+    print(f"[MERGE] Wrote {written} rows from {len(files)} files to {output_path}")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge and summarize temp_results files")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    summarize_parser = subparsers.add_parser("summarize", help="Per-state summary table")
+    summarize_parser.add_argument("input_dir", nargs="?", default="data/states_data_temp")
+    summarize_parser.add_argument(
+        "--output", default="outputs/summarized_result_across_states.csv"
+    )
+
+    merge_parser = subparsers.add_parser("merge", help="Deduplicated union of all results")
+    merge_parser.add_argument("input_dir", nargs="?", default="data/states_data_temp")
+    merge_parser.add_argument("--output", default="form_names_submission_date.csv")
+
+    args = parser.parse_args(argv)
+    if args.command == "summarize":
+        summary = summarize_results(args.input_dir, args.output)
+        print(summary.to_string(index=False))
+    else:
+        merge_results(args.input_dir, args.output)
+
+
+if __name__ == "__main__":
+    main()
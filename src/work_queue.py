@@ -0,0 +1,365 @@
+"""
+Lease-based work queue for spreading a scrape over several hosts.
+
+The queue is a SQLite database on a shared mount next to a shared Arrow work
+table (see src.work_table). Each batch is a per-state row range of that
+table, i.e. exactly one process_state task. Any number of hosts and
+processes claim batches with an expiring lease, heartbeat while they work
+and mark the batch done (or release it) when they finish. A batch whose
+lease expires, because its host crashed or lost the mount, is handed out
+again on the next claim; after MAX_ATTEMPTS claims it is marked failed.
+
+Usage (paths on the shared mount):
+    python -m src.work_queue init --queue /mnt/shared/queue.db \
+        --forms data/form_data_full.csv --select data/to_extract_v2.csv
+    SCRAPE_SINK_DIR=/mnt/shared/sink python -m src.work_queue work \
+        --queue /mnt/shared/queue.db --processes 4      # on every host
+    python -m src.work_queue status --queue /mnt/shared/queue.db
+
+Local check with processes standing in for hosts (crash reclaim, heartbeat):
+    python check_work_queue.py
+
+The database uses SQLite's default rollback journal rather than WAL, since
+WAL needs shared memory that network filesystems do not provide.
+"""
+
+import argparse
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from multiprocessing import Process
+
+LEASE_SECONDS = 600
+MAX_ATTEMPTS = 3
+
+Batch = namedtuple(
+    "Batch", ["batch_id", "state", "input_path", "start", "stop", "chunk_idx", "num_chunks", "attempts"]
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    batch_id INTEGER PRIMARY KEY,
+    state TEXT NOT NULL,
+    input_path TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    stop INTEGER NOT NULL,
+    chunk_idx INTEGER NOT NULL,
+    num_chunks INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result_path TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS batches_status ON batches (status, lease_expires);
+"""
+
+
+def default_owner():
+    """Identify the claiming process as host:pid."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    SQLite-backed queue of process_state batches with expiring leases.
+
+    Args:
+        db_path: Path of the queue database (on the shared mount)
+        lease_seconds: How long a claim stays valid without a heartbeat
+        max_attempts: Claims allowed per batch before it is marked failed
+    """
+
+    def __init__(self, db_path, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front so two hosts can never
+        # select the same pending batch before either has updated it
+        self._conn.execute("BEGIN IMMEDIATE")
+        return self._conn
+
+    def add_batches(self, tasks):
+        """
+        Enqueue process_state tasks (state, input_path, start, stop, chunk_idx, num_chunks).
+
+        Returns:
+            Number of batches added
+        """
+        now = time.time()
+        conn = self._transaction()
+        try:
+            conn.executemany(
+                "INSERT INTO batches (state, input_path, start, stop, chunk_idx, num_chunks, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [tuple(task) + (now,) for task in tasks],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(tasks)
+
+    def claim(self, owner, max_batches=1):
+        """
+        Lease up to max_batches pending or expired batches to owner.
+
+        Returns:
+            List of Batch tuples (empty when nothing is claimable)
+        """
+        now = time.time()
+        conn = self._transaction()
+        try:
+            # Expired leases that used up their attempts are retired first
+            conn.execute(
+                "UPDATE batches SET status = 'failed', owner = NULL, updated_at = ? "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            rows = conn.execute(
+                "SELECT batch_id, state, input_path, start, stop, chunk_idx, num_chunks, attempts "
+                "FROM batches WHERE status = 'pending' "
+                "OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY stop - start DESC, batch_id LIMIT ?",
+                (now, max_batches),
+            ).fetchall()
+            for row in rows:
+                conn.execute(
+                    "UPDATE batches SET status = 'leased', owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE batch_id = ?",
+                    (owner, now + self.lease_seconds, now, row[0]),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return [Batch(*row[:-1], row[-1] + 1) for row in rows]
+
+    def _update_owned(self, batch_id, owner, sql, params):
+        cursor = self._conn.execute(
+            f"UPDATE batches SET {sql}, updated_at = ? "
+            "WHERE batch_id = ? AND owner = ? AND status = 'leased'",
+            params + (time.time(), batch_id, owner),
+        )
+        return cursor.rowcount == 1
+
+    def heartbeat(self, batch_id, owner):
+        """Extend owner's lease; returns False if the lease was lost."""
+        return self._update_owned(
+            batch_id, owner, "lease_expires = ?", (time.time() + self.lease_seconds,)
+        )
+
+    def complete(self, batch_id, owner, result_path=None):
+        """Mark a leased batch done; returns False if the lease was lost."""
+        return self._update_owned(
+            batch_id, owner, "status = 'done', result_path = ?, lease_expires = NULL", (result_path,)
+        )
+
+    def release(self, batch_id, owner):
+        """
+        Hand a leased batch back to the queue without waiting for expiry, or
+        mark it failed if it has used up its attempts.
+        """
+        return self._update_owned(
+            batch_id,
+            owner,
+            "status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "owner = NULL, lease_expires = NULL",
+            (self.max_attempts,),
+        )
+
+    def counts(self):
+        """Number of batches per status."""
+        return dict(self._conn.execute("SELECT status, COUNT(*) FROM batches GROUP BY status"))
+
+    def outstanding(self):
+        """Number of batches not yet done or failed (pending or leased)."""
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM batches WHERE status IN ('pending', 'leased')"
+        ).fetchone()[0]
+
+    def result_paths(self):
+        return [
+            row[0]
+            for row in self._conn.execute(
+                "SELECT result_path FROM batches WHERE status = 'done' AND result_path IS NOT NULL"
+            )
+        ]
+
+
+class Heartbeat:
+    """Context manager that renews a lease from a background thread."""
+
+    def __init__(self, queue_path, batch_id, owner, lease_seconds=LEASE_SECONDS):
+        self.queue_path = queue_path
+        self.batch_id = batch_id
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        # sqlite connections are per-thread, so the heartbeat opens its own
+        queue = WorkQueue(self.queue_path, lease_seconds=self.lease_seconds)
+        try:
+            while not self._stop.wait(self.lease_seconds / 3):
+                if not queue.heartbeat(self.batch_id, self.owner):
+                    self.lost = True
+                    print(f"[QUEUE] Lost lease on batch {self.batch_id}")
+                    return
+        finally:
+            queue.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def _default_process():
+    from src.scraper import process_state
+
+    return process_state
+
+
+def run_worker(queue_path, process=None, lease_seconds=LEASE_SECONDS, owner=None):
+    """
+    Claim and process batches until every batch is done or failed.
+
+    While other workers still hold leases the worker keeps polling, so a
+    batch left behind by a crashed host is picked up once its lease expires.
+    Chrome profiles left by exited workers on this host are removed when the
+    worker starts, and its own profile when it finishes.
+
+    Args:
+        queue_path: Queue database path
+        process: Callable taking a process_state task tuple and returning a
+            result path (defaults to src.scraper.process_state)
+        lease_seconds: Lease length; heartbeats renew it every third of that
+        owner: Owner id (defaults to host:pid)
+
+    Returns:
+        Number of batches completed by this worker
+    """
+    from src.chrome_profiles import cleanup_stale_profiles, remove_worker_profile
+
+    process = process or _default_process()
+    owner = owner or default_owner()
+    cleanup_stale_profiles()
+    queue = WorkQueue(queue_path, lease_seconds=lease_seconds)
+    completed = 0
+    try:
+        while True:
+            batches = queue.claim(owner)
+            if not batches:
+                if not queue.outstanding():
+                    break
+                time.sleep(min(lease_seconds / 3, 30))
+                continue
+            batch = batches[0]
+            task = (batch.state, batch.input_path, batch.start, batch.stop, batch.chunk_idx, batch.num_chunks)
+            print(
+                f"[QUEUE] {owner} claimed batch {batch.batch_id} "
+                f"({batch.state} rows {batch.start}-{batch.stop}, attempt {batch.attempts})"
+            )
+            try:
+                with Heartbeat(queue_path, batch.batch_id, owner, lease_seconds) as heartbeat:
+                    result_path = process(task)
+            except Exception as e:
+                print(f"[QUEUE] Batch {batch.batch_id} failed: {str(e)}")
+                queue.release(batch.batch_id, owner)
+                continue
+            if heartbeat.lost or not queue.complete(batch.batch_id, owner, result_path):
+                print(f"[QUEUE] Batch {batch.batch_id} was reclaimed by another worker")
+                continue
+            completed += 1
+    finally:
+        queue.close()
+        # Profiles are RAM-backed on tmpfs; nothing else removes them on queue hosts
+        remove_worker_profile()
+        cleanup_stale_profiles()
+    return completed
+
+
+def init_queue(queue_path, forms_path, select_path, batch_size=200, input_path=None):
+    """
+    Write the shared work table for the selected filings and enqueue its batches.
+
+    Returns:
+        Number of batches enqueued
+    """
+    from src.failures import clear_failures
+    from src.form_loader import load_forms_table, load_serf_nums
+    from src.work_table import plan_chunks, write_work_table
+
+    input_path = os.path.abspath(
+        input_path or os.path.join(os.path.dirname(os.path.abspath(queue_path)), "work_input.arrow")
+    )
+    queue = WorkQueue(queue_path)
+    try:
+        if queue.counts():
+            raise ValueError(f"Queue {queue_path} already has batches")
+        # Failure logs of an earlier queue on the same work table path are stale
+        clear_failures(input_path)
+        forms = load_forms_table(forms_path, serf_nums=load_serf_nums(select_path))
+        forms = write_work_table(forms, input_path)
+        added = queue.add_batches(plan_chunks(forms, input_path, batch_size))
+    finally:
+        queue.close()
+    print(f"[QUEUE] Enqueued {added} batches of up to {batch_size} filings from {input_path}")
+    return added
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lease-based multi-host work queue")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    init_parser = subparsers.add_parser("init", help="Build the shared work table and enqueue batches")
+    init_parser.add_argument("--queue", required=True)
+    init_parser.add_argument("--forms", default="data/form_data_full.csv")
+    init_parser.add_argument("--select", default="data/to_extract_v2.csv")
+    init_parser.add_argument("--batch-size", type=int, default=200)
+
+    work_parser = subparsers.add_parser("work", help="Process batches on this host")
+    work_parser.add_argument("--queue", required=True)
+    work_parser.add_argument("--processes", type=int, default=1)
+    work_parser.add_argument("--lease-seconds", type=int, default=LEASE_SECONDS)
+
+    status_parser = subparsers.add_parser("status", help="Show batch counts per status")
+    status_parser.add_argument("--queue", required=True)
+
+    args = parser.parse_args(argv)
+    if args.command == "init":
+        init_queue(args.queue, args.forms, args.select, args.batch_size)
+    elif args.command == "work":
+        workers = [
+            Process(target=run_worker, args=(args.queue, None, args.lease_seconds))
+            for _ in range(args.processes)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    else:
+        queue = WorkQueue(args.queue)
+        print(queue.counts())
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Zero-copy work distribution to Pool workers.
+
+The parent writes the filtered input table once, sorted by state, to an
+uncompressed Arrow IPC file. Tasks then carry only (state, path, row range,
+chunk index, chunk count) instead of a pickled DataFrame chunk, and each
+worker memory-maps the file and slices its rows without copying.
+
+Results go the other way through a columnar sink: every worker writes its
+chunk as an Arrow IPC file into a sink directory, and the parent streams
+those files into the final CSV with src.summarize instead of re-parsing
+per-chunk CSVs.
+"""
+
+import os
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+SINK_DIR_ENV = "SCRAPE_SINK_DIR"
+SINK_DIR = "outputs/sink"
+
+
+def run_id(input_path):
+    """Id of the run a work table belongs to: its file stem without any _retry<n> suffix."""
+    return os.path.splitext(os.path.basename(input_path))[0].partition("_retry")[0]
+
+
+def retry_tag(input_path):
+    """The <n> of a retry pass's work_input_<pid>_retry<n>.arrow, or "" for the main pass."""
+    return os.path.splitext(os.path.basename(input_path))[0].partition("_retry")[2]
+
+
+def write_work_table(table, path):
+    """
+    Write the input table, sorted by state, as a memory-mappable Arrow file.
+
+    Args:
+        table: pyarrow Table or pandas DataFrame with a state column
+        path: Output path for the Arrow IPC file
+
+    Returns:
+        The sorted pyarrow Table that was written
+    """
+    if not isinstance(table, pa.Table):
+        table = pa.Table.from_pandas(table, preserve_index=False)
+    table = table.sort_by("state")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return table
+
+
+def plan_chunks(table, path, chunk_size):
+    """
+    Split a state-sorted table into per-state row ranges of at most chunk_size.
+
+    Returns:
+        List of task tuples (state_name, path, start, stop, chunk_idx, num_chunks)
+    """
+    tasks = []
+    counts = pc.value_counts(table.column("state")).to_pylist()
+    start = 0
+    for entry in sorted(counts, key=lambda e: e["values"]):
+        state_name, state_rows = entry["values"], entry["counts"]
+        num_chunks = (state_rows + chunk_size - 1) // chunk_size  # Ceiling division
+        for chunk_idx in range(num_chunks):
+            chunk_start = start + chunk_idx * chunk_size
+            chunk_stop = min(chunk_start + chunk_size, start + state_rows)
+            tasks.append((state_name, path, chunk_start, chunk_stop, chunk_idx, num_chunks))
+        start += state_rows
+    return tasks
+
+
+def read_slice(path, start, stop):
+    """Memory-map the work table and return rows [start, stop) without copying."""
+    reader = pa.ipc.open_file(pa.memory_map(path, "r"))
+    return reader.read_all().slice(start, stop - start)
+
+
+def write_result(name, table, sink_dir=None):
+    """
+    Write one chunk's results to the sink as an Arrow IPC file.
+
+    The file is written under a temporary name and renamed, so a checkpoint
+    being rewritten never leaves a half-written file behind.
+
+    Args:
+        name: File stem, unique per chunk (e.g. temp_results_AL_chunk1_1234)
+        table: pyarrow Table or pandas DataFrame of results
+        sink_dir: Sink directory (defaults to $SCRAPE_SINK_DIR or outputs/sink)
+
+    Returns:
+        Path of the written file
+    """
+    if not isinstance(table, pa.Table):
+        table = pa.Table.from_pandas(table, preserve_index=False)
+    sink_dir = sink_dir or os.environ.get(SINK_DIR_ENV, SINK_DIR)
+    os.makedirs(sink_dir, exist_ok=True)
+    path = os.path.join(sink_dir, f"{name}.arrow")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path